@@ -0,0 +1,110 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from grid import Grid, passable_cells, wall_mask
+from search_path import Coords, find_path_in_cells
+
+Query = namedtuple('Query', ['start', 'destination', 'algorithm'])
+BatchResult = namedtuple('BatchResult', ['index', 'query', 'explored', 'path'])
+
+# Worker process state: passability of the shared maze, built once per worker
+_worker_cells: Optional[bytes] = None
+_worker_size = (0, 0)
+
+
+def _attach_maze(shared_name: str, width: int, height: int) -> None:
+    """Process pool initializer. Reads the wall layer from shared memory and prepares passability table."""
+    global _worker_cells, _worker_size
+    shared = SharedMemory(name=shared_name)
+    try:
+        walls = np.ndarray((height, width), dtype=np.uint8, buffer=shared.buf)
+        _worker_cells = passable_cells(walls)
+        del walls  # release the buffer before closing the shared memory
+    finally:
+        shared.close()
+    _worker_size = width, height
+
+
+def _solve_query(index: int, query: Query) -> BatchResult:
+    """Solves single query in the worker process. Path is returned as coordinates to keep results small."""
+    moves, path = find_path_in_cells(_worker_cells, *_worker_size, Coords(*query.start), Coords(*query.destination),
+                                     query.algorithm)
+    return BatchResult(index, query, len(moves), [node.coords for node in path])
+
+
+class BatchSolver:
+    """
+    Process pool bound to one maze for solving batches of (start, destination, algorithm) queries repeatedly,
+    e.g. routing many agents over the same map every tick. Worker processes are started and read the wall layer
+    from shared memory once, batches only send queries and receive results.
+    Walls are read when the solver is created, later changes of the grid are not seen by the workers.
+    Use as context manager or call close to stop the workers and free the shared memory.
+    :param maze: maze grid of integers, nested list, uint8 NumPy array or grid backend.
+    :param max_workers: number of worker processes, defaults to the number of processors.
+    """
+
+    def __init__(self, maze: Grid, max_workers: Optional[int] = None):
+        walls = wall_mask(maze).astype(np.uint8)
+        height, width = walls.shape
+        self.__shared = SharedMemory(create=True, size=max(walls.nbytes, 1))
+        try:
+            np.ndarray(walls.shape, dtype=np.uint8, buffer=self.__shared.buf)[:] = walls
+            self.__executor = ProcessPoolExecutor(max_workers, initializer=_attach_maze,
+                                                  initargs=(self.__shared.name, width, height))
+        except BaseException:
+            self.__shared.close()
+            self.__shared.unlink()
+            raise
+
+    def __enter__(self) -> 'BatchSolver':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def solve(self, queries: Iterable[Query]) -> Iterator[BatchResult]:
+        """Solves queries in the workers and yields results as soon as they are ready (not in the order of queries,
+        use BatchResult.index to match them). Queries that are not started yet are cancelled if the caller stops
+        iterating early."""
+        futures = [self.__executor.submit(_solve_query, index, Query(*query)) for index, query in enumerate(queries)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def solve_ordered(self, queries: Iterable[Query]) -> List[BatchResult]:
+        """Solves queries and returns results in the order of queries."""
+        return sorted(self.solve(queries), key=lambda result: result.index)
+
+    def close(self) -> None:
+        """Cancels pending queries, stops the workers and frees the shared memory."""
+        self.__executor.shutdown(cancel_futures=True)
+        self.__shared.close()
+        self.__shared.unlink()
+
+
+def solve_batch(maze: Grid, queries: Iterable[Query], max_workers: Optional[int] = None) -> Iterator[BatchResult]:
+    """
+    Solves many (start, destination, algorithm) queries over the same maze in a process pool and yields results
+    as soon as they are ready (not in the order of queries, use BatchResult.index to match them).
+    Only walls of the maze are used: start, destination and explored marks painted in the grid are ignored.
+    The pool is started for this batch only, use BatchSolver to solve many batches over the same maze.
+    :param maze: maze grid of integers, nested list or uint8 NumPy array.
+    :param queries: Query tuples with (x, y) start, (x, y) destination and search mode name (see find_path).
+    :param max_workers: number of worker processes, defaults to the number of processors.
+    :return: iterator over BatchResult tuples: query index, query, number of explored cells and list of path Coords
+             in find_path order or [] if the path is not found.
+    """
+    with BatchSolver(maze, max_workers) as solver:
+        yield from solver.solve(queries)
+
+
+def solve_batch_ordered(maze: Grid, queries: Iterable[Query], max_workers: Optional[int] = None) -> List[BatchResult]:
+    """Solves queries with solve_batch and returns results in the order of queries."""
+    return sorted(solve_batch(maze, queries, max_workers), key=lambda result: result.index)
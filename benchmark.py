@@ -0,0 +1,188 @@
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from config import SearchAlgorithmModes
+from hpa import HierarchicalPlanner
+from main_console import load_maze
+from maze import Maze
+from maze_generator import GENERATORS, open_grid, open_rooms, random_obstacles
+from search_path import find_path
+
+try:
+    from distance_field import bfs_distance_field
+except ImportError:  # distance field needs NumPy
+    bfs_distance_field = None
+
+NODE_MEMORY_BUDGET = 320  # bytes per expanded node documented in search_path.Node
+DEFAULT_SIZES = (64, 128, 256)  # suite grid sizes, pass --sizes up to 4096 for long runs
+
+
+def bench_node_memory(size: int = 300) -> bool:
+    """Solves large open grid with A* and measures peak memory allocated by the search per expanded node.
+    Returns True if it fits into NODE_MEMORY_BUDGET."""
+    grid = open_grid(size, size)
+    tracemalloc.start()
+    started = perf_counter()
+    moves, path = find_path(grid, 'A*')
+    elapsed = perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_node = peak / max(len(moves), 1)
+    print(f'{size}x{size} open grid, A*: expanded {len(moves)} cells, path {len(path)} cells, '
+          f'{elapsed:.2f}s, peak {peak / 2 ** 20:.1f} MiB, {per_node:.0f} bytes per expanded node.')
+    return per_node <= NODE_MEMORY_BUDGET
+
+
+def bench_distance_field(size: int = 1000) -> bool:
+    """Compares vectorized BFS distance field with per-node BFS of find_path on large open grid.
+    Destination is placed in the far corner, so both searches visit every cell.
+    Returns True if the distance field is at least 10 times faster."""
+    if bfs_distance_field is None:
+        print('Distance field benchmark skipped: NumPy is not installed.')
+        return True
+    grid = open_grid(size, size)
+    started = perf_counter()
+    field = bfs_distance_field(grid)
+    field_elapsed = perf_counter() - started
+    started = perf_counter()
+    _, path = find_path(grid, 'BFS')
+    bfs_elapsed = perf_counter() - started
+    assert field.distance(size - 1, size - 1) == len(path) + 1
+    print(f'{size}x{size} open grid: distance field {field_elapsed:.2f}s, find_path BFS {bfs_elapsed:.2f}s, '
+          f'{bfs_elapsed / field_elapsed:.1f}x faster.')
+    return bfs_elapsed >= 10 * field_elapsed
+
+
+def bench_jps() -> bool:
+    """Compares expanded cells and time of Jump Point Search and A* on shipped mazes and large open maps.
+    Returns True if JPS finds paths of the same length as A* everywhere."""
+    mazes = [(file_name, load_maze(file_name)) for file_name in ('maze.txt', 'maze2.txt', 'maze3.txt')]
+    mazes += [('open 300x300', open_grid(300, 300)),
+              ('5% obstacles 300x300', random_obstacles(300, 300, density=0.05)),
+              ('20% obstacles 300x300', random_obstacles(300, 300, density=0.2))]
+    same_paths = True
+    for name, grid in mazes:
+        results = {}
+        for mode in ('A*', 'Jump Point Search'):
+            started = perf_counter()
+            moves, path = find_path(grid, mode)
+            results[mode] = len(moves), len(path), perf_counter() - started
+        (a_star_moves, a_star_path, a_star_time), (jps_moves, jps_path, jps_time) = results.values()
+        same_paths &= a_star_path == jps_path
+        print(f'{name}: A* expanded {a_star_moves} cells in {a_star_time:.3f}s, '
+              f'JPS expanded {jps_moves} jump points in {jps_time:.3f}s, path {jps_path} cells.')
+    return same_paths
+
+
+def bench_hpa(size: int = 1024) -> bool:
+    """Compares query time of the hierarchical planner and A* on large maps, reports graph build time
+    and path length against A*. Returns True if the planner finds a path exactly where A* does."""
+    same_reachability = True
+    for name, grid in ((f'open rooms {size}x{size}', open_rooms(size, size, 0)),
+                       (f'20% obstacles {size}x{size}', random_obstacles(size, size, 0, density=0.2))):
+        started = perf_counter()
+        planner = HierarchicalPlanner(Maze.from_grid(grid))
+        build_time = perf_counter() - started
+        started = perf_counter()
+        _, hpa_path = planner.find_path()
+        hpa_time = perf_counter() - started
+        started = perf_counter()
+        _, a_star_path = find_path(grid, 'A*')
+        a_star_time = perf_counter() - started
+        planner.close()
+        same_reachability &= bool(hpa_path) == bool(a_star_path)
+        print(f'{name}: graph built in {build_time:.2f}s, HPA* query {hpa_time:.3f}s, A* {a_star_time:.3f}s, '
+              f'path {len(hpa_path)} cells (A* {len(a_star_path)}).')
+    return same_reachability
+
+
+def measure_search(grid: List[List[int]], mode: str, measure_memory: bool = True) -> Dict[str, float]:
+    """Solves the grid with given search mode. Returns wall time, peak memory allocated by the search
+    (traced in a separate run, tracing slows the search down), number of expanded cells and path length."""
+    started = perf_counter()
+    moves, path = find_path(grid, mode)
+    result = {'time': perf_counter() - started, 'peak_memory': None, 'expanded': len(moves), 'path_length': len(path)}
+    del moves, path
+    if measure_memory:
+        tracemalloc.start()
+        find_path(grid, mode)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_suite(generators: List[str], sizes: List[int], modes: List[str], seed: int = 0,
+              measure_memory: bool = True) -> List[Dict]:
+    """Runs every search mode on every generated maze and prints one line per run."""
+    results = []
+    for generator in generators:
+        for size in sizes:
+            grid = GENERATORS[generator](size, size, seed)
+            for mode in modes:
+                result = {'generator': generator, 'size': size, 'mode': mode, **measure_search(grid, mode, measure_memory)}
+                results.append(result)
+                memory = f"{result['peak_memory'] / 2 ** 20:.1f} MiB" if result['peak_memory'] is not None else '-'
+                print(f"{generator:>9} {size:>5} {mode:>18}: {result['time']:8.3f}s, {memory:>10}, "
+                      f"expanded {result['expanded']}, path {result['path_length']}")
+    return results
+
+
+def compare_results(results: List[Dict], baseline: List[Dict], tolerance: float) -> bool:
+    """Compares results with the baseline run. Reports changed paths and expanded cells and runs that became
+    slower than the baseline by more than tolerance (0.2 = 20%). Returns True if there are no regressions."""
+    baseline_runs = {(run['generator'], run['size'], run['mode']): run for run in baseline}
+    passed = True
+    for run in results:
+        previous = baseline_runs.get((run['generator'], run['size'], run['mode']))
+        if previous is None:
+            continue
+        name = f"{run['generator']} {run['size']} {run['mode']}"
+        if (run['path_length'], run['expanded']) != (previous['path_length'], previous['expanded']):
+            print(f"{name}: path {previous['path_length']} -> {run['path_length']}, "
+                  f"expanded {previous['expanded']} -> {run['expanded']}")
+            passed = False
+        if run['time'] > previous['time'] * (1 + tolerance):
+            print(f"{name}: {previous['time']:.3f}s -> {run['time']:.3f}s")
+            passed = False
+    return passed
+
+
+def parse_arguments(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark search modes on generated mazes.')
+    parser.add_argument('--generators', nargs='+', choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES), help='grid sizes (64 - 4096)')
+    parser.add_argument('--modes', nargs='+', choices=[mode.value for mode in SearchAlgorithmModes],
+                        default=[mode.value for mode in SearchAlgorithmModes])
+    parser.add_argument('--seed', type=int, default=0, help='maze generators seed')
+    parser.add_argument('--no-memory', action='store_true', help='skip peak memory measurement')
+    parser.add_argument('--output', help='write results to JSON file')
+    parser.add_argument('--compare', help='JSON file of the previous run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown against --compare run')
+    parser.add_argument('--checks', action='store_true',
+                        help='run node memory, distance field, Jump Point Search and HPA* checks instead of the suite')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    args = parse_arguments(arguments)
+    if args.checks:
+        return 0 if all([bench_node_memory(), bench_distance_field(), bench_jps(), bench_hpa()]) else 1
+    results = run_suite(args.generators, args.sizes, args.modes, args.seed, not args.no_memory)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(), 'seed': args.seed,
+                       'results': results}, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            return 0 if compare_results(results, json.load(file)['results'], args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    """Runs the benchmark suite, see python benchmark.py --help."""
+    sys.exit(main())
@@ -0,0 +1,150 @@
+from array import array
+from typing import Iterator, Optional, Set, Tuple
+
+from config import GridSymbols
+from grid import free_cells
+
+
+RING = ((-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0))  # cells around a cell in order
+
+
+class ComponentIndex:
+    """Connected components of maze cells that are not walls (4-neighbourhood), bound to a Maze, so a query with
+    the destination walled off from the start is answered without a search.
+    Cells are labelled by flood fill on the first query and kept up to date by maze change notifications:
+    a removed wall joins components of its neighbours (union-find over labels), an added wall that may split
+    its component marks the component stale, stale components are labelled again from the queried cell.
+    Clearing or loading the maze labels the cells again on the next query.
+    Only walls split components, see grid.free_cells.
+    The index keeps a byte and a label for every cell, it is meant for grids kept in memory, not grid backends."""
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.__free: Optional[bytearray] = None
+        self.__labels: Optional[array] = None  # component label of every cell (row by row), -1 for walls
+        self.__parents = array('i')  # union-find forest over labels
+        self.__stale: Set[int] = set()  # root labels of components that may have been split by walls
+        maze.add_change_listener(self.__on_maze_change)
+
+    def close(self) -> None:
+        """Unsubscribes the index from maze changes."""
+        self.maze.remove_change_listener(self.__on_maze_change)
+
+    def __on_maze_change(self, coords: Optional[Tuple[int, int]]) -> None:
+        if self.__labels is None:
+            return
+        if coords is None:
+            self.__labels = None
+            return
+        x, y = coords
+        index = y * self.maze.width + x
+        free = self.maze.grid[y][x] != GridSymbols.WALL.value
+        if self.__free[index] == free:  # agent and destination moves don't change components
+            return
+        self.__free[index] = free
+        neighbours = [neighbour for neighbour in self.__neighbours(index) if self.__free[neighbour]]
+        if free:
+            label = self.__new_label()
+            self.__labels[index] = label
+            for neighbour in neighbours:
+                self.__union(label, self.__labels[neighbour])
+        else:
+            root = self.__find(self.__labels[index])
+            self.__labels[index] = -1
+            if len(neighbours) > 1 and self.__may_split(x, y):
+                self.__stale.add(root)
+
+    def __may_split(self, x: int, y: int) -> bool:
+        """Checks whether the new wall may disconnect its free neighbours. It can't if they are connected
+        by free cells around the wall: walking around it they lie in the same run of free cells."""
+        width, height, free = self.maze.width, self.maze.height, self.__free
+        ring = [0 <= x + dx < width and 0 <= y + dy < height and free[(y + dy) * width + x + dx]
+                for dx, dy in RING]
+        if all(ring):
+            return False
+        first_wall = ring.index(False)
+        ring = ring[first_wall:] + ring[:first_wall]  # runs of free cells don't wrap around now
+        runs_with_neighbours, in_run, neighbour_in_run = 0, False, False
+        for position, cell_free in enumerate(ring + [False]):
+            if cell_free:
+                in_run = True
+                neighbour_in_run |= (position + first_wall) % 2 == 1  # odd ring positions are the neighbours
+            elif in_run:
+                runs_with_neighbours += neighbour_in_run
+                in_run, neighbour_in_run = False, False
+        return runs_with_neighbours > 1
+
+    def __neighbours(self, index: int) -> Iterator[int]:
+        width, height = self.maze.width, self.maze.height
+        y, x = divmod(index, width)
+        if x > 0:
+            yield index - 1
+        if x + 1 < width:
+            yield index + 1
+        if y > 0:
+            yield index - width
+        if y + 1 < height:
+            yield index + width
+
+    def __new_label(self) -> int:
+        self.__parents.append(len(self.__parents))
+        return len(self.__parents) - 1
+
+    def __find(self, label: int) -> int:
+        parents = self.__parents
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+    def __union(self, first: int, second: int) -> None:
+        first, second = self.__find(first), self.__find(second)
+        if first != second:
+            self.__parents[second] = first
+            if second in self.__stale:
+                self.__stale.discard(second)
+                self.__stale.add(first)
+
+    def __flood(self, index: int, label: int) -> None:
+        """Labels all cells reachable from the cell with label."""
+        labels, free, width = self.__labels, self.__free, self.maze.width
+        last_column = width - 1
+        size = len(labels)
+        labels[index] = label
+        queue = [index]
+        for index in queue:
+            x = index % width
+            for neighbour, inside in ((index - 1, x > 0), (index + 1, x < last_column),
+                                      (index - width, index >= width), (index + width, index + width < size)):
+                if inside and free[neighbour] and labels[neighbour] != label:
+                    labels[neighbour] = label
+                    queue.append(neighbour)
+
+    def build(self) -> None:
+        """Labels all cells."""
+        self.__free = free_cells(self.maze.grid)
+        self.__labels = array('i', [-1]) * len(self.__free)
+        self.__parents = array('i')
+        self.__stale.clear()
+        for index, free in enumerate(self.__free):
+            if free and self.__labels[index] < 0:
+                self.__flood(index, self.__new_label())
+
+    def component(self, x: int, y: int) -> Optional[int]:
+        """Returns label of the component of the cell or None for walls. Labels change as walls are edited,
+        they are only comparable between queries without maze changes in between."""
+        if self.__labels is None:
+            self.build()
+        index = y * self.maze.width + x
+        if self.__labels[index] < 0:
+            return None
+        root = self.__find(self.__labels[index])
+        if root in self.__stale:
+            self.__flood(index, self.__new_label())
+            root = self.__find(self.__labels[index])
+        return root
+
+    def connected(self, first: Tuple[int, int], second: Tuple[int, int]) -> bool:
+        """Checks whether path between cells may exist."""
+        first_component = self.component(*first)
+        return first_component is not None and first_component == self.component(*second)
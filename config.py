@@ -16,6 +16,9 @@ class Colors:
     ORANGE = (255, 136, 0)
     ORANGE_LITE = (255, 210, 0)
     FUCHSIA = (255, 0, 255)
+    SAND = (226, 202, 150)
+    MUD = (139, 105, 76)
+    WATER = (111, 176, 225)
 
 
 class __NextEnumMixin:
@@ -33,12 +36,18 @@ class GridSymbols(Enum):
     PATH = 3
     START = 4
     DESTINATION = 5
+    SAND = 6  # terrain cells are passable, moving into them costs Settings.TERRAIN_COSTS
+    MUD = 7
+    WATER = 8
 
 
 class SceneDrawingModes(__NextEnumMixin, Enum):
     WALLS = 1
     AGENT = 2
     DESTINATION = 3
+    SAND = 4
+    MUD = 5
+    WATER = 6
 
 
 class SearchAlgorithmModes(__NextEnumMixin, Enum):
@@ -46,6 +55,22 @@ class SearchAlgorithmModes(__NextEnumMixin, Enum):
     DFS = 'DFS'
     GREEDY_BFS = 'Greedy BFS'
     A_STAR = 'A*'
+    BIDIRECTIONAL_BFS = 'Bidirectional BFS'
+    BIDIRECTIONAL_A_STAR = 'Bidirectional A*'
+    JPS = 'Jump Point Search'
+    DIJKSTRA = 'Dijkstra'
+
+
+class Heuristics(Enum):
+    MANHATTAN = 'manhattan'  # default for 4-connected moves
+    OCTILE = 'octile'  # default for 8-connected moves
+    EUCLIDEAN = 'euclidean'
+
+
+class SearchEventKinds(Enum):
+    EXPLORED = 'explored'  # event value is inspected Node
+    PATH = 'path'  # event value is the list of found path Nodes or [] if the path doesn't exist
+    STOPPED = 'stopped'  # search was cancelled or ran out of expansions, event value is []
 
 
 class Settings:
@@ -56,6 +81,11 @@ class Settings:
     DESTINATION_COLOR = Colors.RED
     EXPLORED_COLOR = Colors.ORANGE_LITE
     PATH_FOUND_COLOR = Colors.GREEN
+    TERRAIN_COLORS = {GridSymbols.SAND.value: Colors.SAND, GridSymbols.MUD.value: Colors.MUD,
+                      GridSymbols.WATER.value: Colors.WATER}
+
+    # cost of moving into the cell for weighted searches, other passable cells cost 1 (diagonal moves cost sqrt(2) x)
+    TERRAIN_COSTS = {GridSymbols.SAND.value: 2, GridSymbols.MUD.value: 4, GridSymbols.WATER.value: 8}
 
     _Size = namedtuple('Size', ['width', 'height'])
     WINDOW_SIZE = _Size(width=800, height=850)
@@ -64,3 +94,11 @@ class Settings:
     LABEL_HEIGHT = 50
 
     FPS = 60
+
+    ANIMATION_CELLS_PER_FRAME = 4  # solve animation speed, changed with +/- keys
+    ANIMATION_MAX_CELLS_PER_FRAME = 4096
+    ANIMATION_TIME_BUDGET = 0.008  # max seconds per frame spent on the solve animation
+
+    PATH_CACHE_SIZE = 32  # number of search results kept by Maze.solve
+    STREAM_CACHE_MAX_EXPLORED = 4096  # Maze.iter_solve doesn't cache searches that inspected more cells
+    HPA_CLUSTER_SIZE = 32  # cluster side in cells of the hierarchical planner (hpa.py)
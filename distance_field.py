@@ -0,0 +1,85 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from grid import Grid, find_value, passable_mask
+from search_path import Coords, Node, nodes_from_cells
+
+
+class DistanceField:
+    """BFS distances from the start to every cell of the maze and predecessor of every reached cell.
+    distances[y, x] is the number of moves from the start or -1 if the cell is unreachable,
+    predecessors[y, x] is the flat index (y * width + x) of the previous cell on the shortest path or -1."""
+
+    def __init__(self, start: Coords, distances: np.ndarray, predecessors: np.ndarray):
+        self.start = start
+        self.distances = distances
+        self.predecessors = predecessors
+
+    def distance(self, x: int, y: int) -> Optional[int]:
+        """Returns number of moves from the start to the cell or None if it is unreachable."""
+        distance = int(self.distances[y, x])
+        return distance if distance >= 0 else None
+
+    def is_reachable(self, x: int, y: int) -> bool:
+        return self.distances[y, x] >= 0
+
+    def path_to(self, x: int, y: int) -> List[Node]:
+        """Reconstructs shortest path to the cell from the predecessor map without searching again.
+        Returns path in find_path format: cells between the start and the target, starting from the target side,
+        or [] if the target is unreachable or adjacent to the start."""
+        if not self.is_reachable(x, y):
+            return []
+        width = self.distances.shape[1]
+        predecessors = self.predecessors.ravel()
+        cells = []
+        index = int(predecessors[y * width + x])
+        while index >= 0 and (index % width, index // width) != self.start:
+            cells.append(Coords(index % width, index // width))
+            index = int(predecessors[index])
+        return nodes_from_cells(cells[::-1])
+
+
+def bfs_distance_field(maze: Grid, start: Optional[Tuple[int, int]] = None) -> DistanceField:
+    """
+    Computes BFS distances from the start to every cell of the maze. The search moves in the same 4-neighbourhood
+    and steps into the same cells (0 and 5 - valued) as find_path, but expands the whole frontier at once
+    with NumPy array operations instead of one node at a time.
+    :param maze: maze grid of integers, nested list or uint8 NumPy array.
+    :param start: (x, y) coordinates of the start or None to use cell with value 4.
+    :return: DistanceField with distances and predecessors of all cells.
+    """
+    maze = np.asarray(maze, dtype=np.uint8)
+    height, width = maze.shape
+    start = Coords(*(start if start is not None else find_value(maze, 4)))
+    padded_width = width + 2
+    # grid is surrounded by a border of closed cells, so neighbour indexes never leave the array
+    open_cells = np.zeros((height + 2, padded_width), dtype=bool)
+    open_cells[1:-1, 1:-1] = passable_mask(maze)
+    open_cells = open_cells.ravel()
+    distances = np.full(open_cells.size, -1, dtype=np.int32)
+    predecessors = np.full(open_cells.size, -1, dtype=np.int64)
+
+    start_index = (start.height + 1) * padded_width + start.width + 1
+    open_cells[start_index] = False
+    distances[start_index] = 0
+    offsets = np.array((padded_width, 1, -padded_width, -1))  # same neighbours order as in find_path
+    frontier = np.array([start_index])
+    level = 0
+    while frontier.size:
+        level += 1
+        candidates = (offsets[:, None] + frontier).ravel()
+        parents = np.tile(frontier, len(offsets))
+        reachable = open_cells[candidates]
+        candidates, first = np.unique(candidates[reachable], return_index=True)
+        open_cells[candidates] = False
+        distances[candidates] = level
+        predecessors[candidates] = parents[reachable][first]
+        frontier = candidates
+
+    distances = distances.reshape(height + 2, padded_width)[1:-1, 1:-1]
+    predecessors = predecessors.reshape(height + 2, padded_width)[1:-1, 1:-1]
+    # convert padded flat indexes of predecessors to flat indexes of the maze
+    predecessors = np.where(predecessors >= 0,
+                            (predecessors // padded_width - 1) * width + predecessors % padded_width - 1, -1)
+    return DistanceField(start, np.ascontiguousarray(distances), predecessors)
@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Union, Iterable
+
+from config import GridSymbols, Settings
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: nested list grids are used without it
+    np = None
+
+PASSABLE_VALUES = (GridSymbols.EMPTY.value, GridSymbols.DESTINATION.value, *Settings.TERRAIN_COSTS)
+
+
+class GridBackend(ABC):
+    """Base class for grid storages that are not kept in memory as a whole (see tiled_grid.TiledGrid).
+    Cells are accessed as grid[y][x], whole grid operations of this module are delegated to the methods below."""
+
+    @abstractmethod
+    def size(self) -> Tuple[int, int]:
+        pass
+
+    @abstractmethod
+    def find_value(self, value: int) -> Optional[Tuple[int, int]]:
+        pass
+
+    @abstractmethod
+    def fill(self, value: int) -> None:
+        pass
+
+    @abstractmethod
+    def replace_values(self, values: Tuple[int, ...], new_value: int) -> None:
+        pass
+
+    @abstractmethod
+    def passable_cells(self):
+        """Returns object indexed by flat cell index (y * width + x) that is 1 for passable cells and 0 otherwise."""
+
+    @abstractmethod
+    def cell_costs(self):
+        """Returns object indexed by flat cell index (y * width + x) that is the cost of moving into the cell."""
+
+    @abstractmethod
+    def wall_mask(self) -> 'np.ndarray':
+        """Returns boolean array of the whole grid that marks walls."""
+
+    @abstractmethod
+    def free_cells(self) -> bytearray:
+        """Returns flat row by row layer of the whole grid: 1 for cells that are not walls, 0 for walls."""
+
+
+Grid = Union[List[List[int]], 'np.ndarray', GridBackend]
+
+
+def is_array(grid: Grid) -> bool:
+    """Checks whether grid is NumPy array."""
+    return np is not None and isinstance(grid, np.ndarray)
+
+
+def new_grid(width: int, height: int, use_numpy: bool = False) -> Grid:
+    """Returns empty grid: uint8 NumPy array if use_numpy is set or nested list of integers."""
+    if use_numpy:
+        if np is None:
+            raise ImportError('NumPy is required for array grids')
+        return np.zeros((height, width), dtype=np.uint8)
+    return [[GridSymbols.EMPTY.value for _ in range(width)] for _ in range(height)]
+
+
+def grid_from_rows(rows: List[str], use_numpy: bool = False) -> Grid:
+    """Converts text rows of digits into grid."""
+    if use_numpy:
+        if np is None:
+            raise ImportError('NumPy is required for array grids')
+        if not rows:
+            return np.zeros((0, 0), dtype=np.uint8)
+        cells = np.frombuffer(''.join(rows).encode('ascii'), dtype=np.uint8) - ord('0')
+        return cells.reshape(len(rows), len(rows[0]))
+    return [[int(char) for char in row] for row in rows]
+
+
+def grid_size(grid: Grid) -> Tuple[int, int]:
+    """Returns grid (width, height)."""
+    if isinstance(grid, GridBackend):
+        return grid.size()
+    if is_array(grid):
+        return grid.shape[1], grid.shape[0]
+    return (len(grid[0]) if grid else 0), len(grid)
+
+
+def find_value(grid: Grid, value: int) -> Optional[Tuple[int, int]]:
+    """Returns (x, y) of the 1st occurrence of value in grid (row by row) or None if not found."""
+    if isinstance(grid, GridBackend):
+        return grid.find_value(value)
+    if is_array(grid):
+        mask = grid == value
+        index = int(mask.argmax())
+        if not mask.flat[index]:
+            return None
+        return index % grid.shape[1], index // grid.shape[1]
+    for y, line in enumerate(grid):
+        for x, char in enumerate(line):
+            if char == value:
+                return x, y
+    return None
+
+
+def fill(grid: Grid, value: int) -> None:
+    """Sets every cell of the grid to value in place."""
+    if isinstance(grid, GridBackend):
+        grid.fill(value)
+        return
+    if is_array(grid):
+        grid.fill(value)
+        return
+    for line in grid:
+        line[:] = [value] * len(line)
+
+
+def replace_values(grid: Grid, values: Iterable[int], new_value: int) -> None:
+    """Replaces all cells which are equal to one of values with new_value in place."""
+    values = tuple(values)
+    if isinstance(grid, GridBackend):
+        grid.replace_values(values, new_value)
+        return
+    if is_array(grid):
+        grid[np.isin(grid, values)] = new_value
+        return
+    for line in grid:
+        line[:] = [new_value if char in values else char for char in line]
+
+
+def wall_mask(grid: Grid) -> 'np.ndarray':
+    """Returns boolean array that marks walls."""
+    if isinstance(grid, GridBackend):
+        return grid.wall_mask()
+    return np.asarray(grid) == GridSymbols.WALL.value
+
+
+def passable_mask(grid: Grid) -> 'np.ndarray':
+    """Returns boolean array that marks cells the search can step into (free cells, terrain and destination)."""
+    return np.isin(np.asarray(grid), PASSABLE_VALUES)
+
+
+def passable_cells(grid: Grid) -> bytes:
+    """Returns passability of every cell flattened row by row: 1 for free cells, terrain and destination,
+    0 otherwise.
+    Grid backends return lazy object with the same indexing instead of bytes."""
+    if isinstance(grid, GridBackend):
+        return grid.passable_cells()
+    if is_array(grid):
+        return passable_mask(grid).tobytes()
+    return bytes(char in PASSABLE_VALUES for line in grid for char in line)
+
+
+def free_cells(grid: Grid) -> bytearray:
+    """Returns flat row by row layer of the grid: 1 for cells that are not walls, 0 for walls.
+    Planners that keep state between queries (components, incremental, hpa) block only walls of this layer:
+    explored and found path marks painted in the grid don't affect them."""
+    if isinstance(grid, GridBackend):
+        return grid.free_cells()
+    if is_array(grid):
+        return bytearray((np.asarray(grid) != GridSymbols.WALL.value).astype(np.uint8).tobytes())
+    wall = GridSymbols.WALL.value
+    return bytearray(b''.join(bytes(cell != wall for cell in row) for row in grid))
+
+
+def cost_table() -> 'np.ndarray':
+    """Returns uint8 array that maps cell value to the cost of moving into the cell."""
+    table = np.ones(256, dtype=np.uint8)
+    for value, cost in Settings.TERRAIN_COSTS.items():
+        table[value] = cost
+    return table
+
+
+def cell_costs(grid: Grid) -> bytes:
+    """Returns cost of moving into every cell flattened row by row: Settings.TERRAIN_COSTS for terrain, 1 otherwise.
+    Grid backends return lazy object with the same indexing instead of bytes."""
+    if isinstance(grid, GridBackend):
+        return grid.cell_costs()
+    if is_array(grid):
+        return cost_table()[np.asarray(grid)].tobytes()
+    costs = Settings.TERRAIN_COSTS
+    return bytes(costs.get(cell, 1) for row in grid for cell in row)
@@ -0,0 +1,420 @@
+import heapq
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import GridSymbols, Settings
+from grid import free_cells
+from maze import Maze
+from search_path import Coords, Node, nodes_from_cells
+
+# Abstract graph file: header followed by int32 little-endian numbers.
+# Header: magic, format version, reserved, cluster size, maze width, height, CRC32 of the free cells layer.
+# Numbers: count of entrance pairs, pairs (x, y of the cell in the left/upper cluster, x, y in the other one),
+# then for every cluster (row by row): count of entrances n, their x, y and n x n distances (-1 if unreachable).
+MAGIC = b'HPAG'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHIII')
+
+Cluster = Tuple[int, int]
+Border = Tuple[int, int, bool]  # cluster x, y and whether it is its bottom border (right border otherwise)
+MAX_SINGLE_ENTRANCE = 6  # longer openings between clusters get entrances on both ends
+
+
+def graph_file_name(maze_file_name: str) -> str:
+    """Returns name of the abstract graph file saved next to the maze file."""
+    return maze_file_name + '.hpa'
+
+
+class HierarchicalPlanner:
+    """HPA* planner bound to a Maze for repeated queries on big static mazes.
+    The maze is split into square clusters of cluster_size cells, entrances are placed on openings between
+    neighbouring clusters and distances between entrances of each cluster are precomputed. A query searches this
+    abstract graph and then refines only the segments of the found abstract path inside their clusters,
+    so found paths are close to the shortest but not always the shortest.
+    The planner subscribes to maze changes: clusters whose walls were changed are rebuilt before the next query
+    (with neighbours whose entrances moved), clearing or loading the maze rebuilds the whole graph.
+    Only walls block the plan, see grid.free_cells."""
+
+    def __init__(self, maze: Maze, cluster_size: int = Settings.HPA_CLUSTER_SIZE, build: bool = True):
+        self.maze = maze
+        self.cluster_size = cluster_size
+        self.columns = (maze.width + cluster_size - 1) // cluster_size
+        self.rows = (maze.height + cluster_size - 1) // cluster_size
+        self.__free = bytearray(maze.width * maze.height)
+        self.__borders: Dict[Border, List[Tuple[Coords, Coords]]] = {}  # entrance pairs on each border
+        self.__partners: Dict[Coords, Set[Coords]] = {}  # entrances of neighbouring clusters connected to the entrance
+        self.__distances: Dict[Cluster, Dict[Coords, Dict[Coords, int]]] = {}  # between entrances of the cluster
+        self.__edges: Dict[Coords, List[Tuple[Coords, int]]] = {}  # abstract graph: neighbours of entrances, costs
+        self.__dirty_clusters: Set[Cluster] = set()
+        self.__rebuild_required = True
+        maze.add_change_listener(self.__on_maze_change)
+        if build:
+            self.build()
+
+    @classmethod
+    def open(cls, maze: Maze, maze_file_name: str, cluster_size: int = Settings.HPA_CLUSTER_SIZE):
+        """Loads the abstract graph saved next to the maze file. The graph is built and saved if there is no file
+        or it was built for other walls or cluster size."""
+        planner = cls(maze, cluster_size, build=False)
+        file_name = graph_file_name(maze_file_name)
+        if not os.path.exists(file_name) or not planner.load(file_name):
+            planner.build()
+            planner.save(file_name)
+        return planner
+
+    def close(self) -> None:
+        """Unsubscribes the planner from maze changes."""
+        self.maze.remove_change_listener(self.__on_maze_change)
+
+    def __on_maze_change(self, coords: Optional[Tuple[int, int]]) -> None:
+        if coords is None:
+            self.__rebuild_required = True
+            return
+        x, y = coords
+        free = self.maze.grid[y][x] != GridSymbols.WALL.value
+        index = y * self.maze.width + x
+        if self.__free[index] != free:  # agent and destination moves don't change the graph
+            self.__free[index] = free
+            self.__dirty_clusters.add((x // self.cluster_size, y // self.cluster_size))
+
+    def __cluster_of(self, cell: Coords) -> Cluster:
+        return cell.width // self.cluster_size, cell.height // self.cluster_size
+
+    def __bounds(self, cluster: Cluster) -> Tuple[int, int, int, int]:
+        """Returns left, top, right, bottom (exclusive) cell bounds of the cluster."""
+        left, top = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return left, top, min(left + self.cluster_size, self.maze.width), min(top + self.cluster_size, self.maze.height)
+
+    def __cluster_borders(self, cluster: Cluster) -> List[Border]:
+        """Returns borders of the cluster that lie between it and its neighbour."""
+        x, y = cluster
+        borders = []
+        if x + 1 < self.columns:
+            borders.append((x, y, False))
+        if x > 0:
+            borders.append((x - 1, y, False))
+        if y + 1 < self.rows:
+            borders.append((x, y, True))
+        if y > 0:
+            borders.append((x, y - 1, True))
+        return borders
+
+    def __find_entrances(self, border: Border) -> List[Tuple[Coords, Coords]]:
+        """Finds openings on the border and returns pairs of connected cells placed on them."""
+        cluster_x, cluster_y, bottom = border
+        left, top, right, down = self.__bounds((cluster_x, cluster_y))
+        width, free = self.maze.width, self.__free
+        if bottom:
+            cells = [(Coords(x, down - 1), Coords(x, down)) for x in range(left, right)]
+        else:
+            cells = [(Coords(right - 1, y), Coords(right, y)) for y in range(top, down)]
+        entrances, opening = [], []
+        for pair in cells + [None]:
+            if pair is not None and all(free[cell.height * width + cell.width] for cell in pair):
+                opening.append(pair)
+            elif opening:
+                if len(opening) < MAX_SINGLE_ENTRANCE:
+                    entrances.append(opening[len(opening) // 2])
+                else:
+                    entrances.extend((opening[0], opening[-1]))
+                opening = []
+        return entrances
+
+    def __set_border(self, border: Border, entrances: List[Tuple[Coords, Coords]]) -> None:
+        for first, second in self.__borders.get(border, []):
+            self.__partners[first].discard(second)
+            self.__partners[second].discard(first)
+        self.__borders[border] = entrances
+        for first, second in entrances:
+            self.__partners.setdefault(first, set()).add(second)
+            self.__partners.setdefault(second, set()).add(first)
+
+    def __entrances(self, cluster: Cluster) -> Set[Coords]:
+        return {cell for border in self.__cluster_borders(cluster) for pair in self.__borders.get(border, [])
+                for cell in pair if self.__cluster_of(cell) == cluster}
+
+    def __cluster_moves(self, cluster: Cluster) -> List[List[int]]:
+        """Returns possible moves inside the cluster: for every cell (indexed row by row inside the cluster)
+        indexes of free neighbouring cells of the cluster."""
+        left, top, right, down = self.__bounds(cluster)
+        width, free = self.maze.width, self.__free
+        cluster_width = right - left
+        moves = []
+        for y in range(top, down):
+            for x in range(left, right):
+                index = y * width + x
+                local = (y - top) * cluster_width + x - left
+                moves.append([neighbour_local for neighbour, neighbour_local, inside in (
+                    (index - 1, local - 1, x > left), (index + 1, local + 1, x + 1 < right),
+                    (index - width, local - cluster_width, y > top),
+                    (index + width, local + cluster_width, y + 1 < down))
+                    if inside and free[index] and free[neighbour]])
+        return moves
+
+    def __cluster_distances(self, source: Coords, targets: Iterable[Coords], cluster: Cluster,
+                            moves: Optional[List[List[int]]] = None) -> Dict[Coords, int]:
+        """BFS from source that doesn't leave the cluster. Stops when all targets are reached.
+        Returns distances to the reached targets."""
+        left, top, right, _ = self.__bounds(cluster)
+        cluster_width = right - left
+        moves = moves or self.__cluster_moves(cluster)
+        remaining = {(cell.height - top) * cluster_width + cell.width - left: cell for cell in targets}
+        start = (source.height - top) * cluster_width + source.width - left
+        distances, steps, queue = {}, [-1] * len(moves), [start]
+        steps[start] = 0
+        for index in queue:
+            if index in remaining:
+                distances[remaining.pop(index)] = steps[index]
+                if not remaining:
+                    break
+            step = steps[index] + 1
+            for neighbour in moves[index]:
+                if steps[neighbour] < 0:
+                    steps[neighbour] = step
+                    queue.append(neighbour)
+        return distances
+
+    def __build_cluster(self, cluster: Cluster) -> None:
+        entrances = self.__entrances(cluster)
+        moves = self.__cluster_moves(cluster) if entrances else None
+        self.__set_distances(cluster, {entrance: self.__cluster_distances(entrance, entrances - {entrance}, cluster,
+                                                                          moves)
+                                       for entrance in entrances})
+
+    def __set_distances(self, cluster: Cluster, distances: Dict[Coords, Dict[Coords, int]]) -> None:
+        """Sets distances between entrances of the cluster and updates abstract graph edges of its entrances."""
+        for entrance in self.__distances.get(cluster, ()):
+            self.__edges.pop(entrance, None)
+        self.__distances[cluster] = distances
+        for entrance, others in distances.items():
+            self.__edges[entrance] = [(partner, 1) for partner in self.__partners.get(entrance, ())] \
+                + list(others.items())
+
+    def build(self) -> None:
+        """Builds the whole abstract graph."""
+        self.__free = free_cells(self.maze.grid)
+        self.__borders, self.__partners, self.__distances, self.__edges = {}, {}, {}, {}
+        for cluster_y in range(self.rows):
+            for cluster_x in range(self.columns):
+                for bottom in (False, True):
+                    if (cluster_y + 1 < self.rows) if bottom else (cluster_x + 1 < self.columns):
+                        border = cluster_x, cluster_y, bottom
+                        self.__set_border(border, self.__find_entrances(border))
+        for cluster_y in range(self.rows):
+            for cluster_x in range(self.columns):
+                self.__build_cluster((cluster_x, cluster_y))
+        self.__dirty_clusters.clear()
+        self.__rebuild_required = False
+
+    def __update(self) -> None:
+        """Rebuilds clusters changed since the last query."""
+        if self.__rebuild_required:
+            self.build()
+            return
+        rebuilt = set(self.__dirty_clusters)
+        for cluster in self.__dirty_clusters:
+            for border in self.__cluster_borders(cluster):
+                entrances = self.__find_entrances(border)
+                if entrances != self.__borders.get(border):
+                    self.__set_border(border, entrances)
+                    rebuilt.update(((border[0], border[1]), (border[0], border[1] + 1) if border[2]
+                                    else (border[0] + 1, border[1])))
+        for cluster in rebuilt:
+            self.__build_cluster(cluster)
+        self.__dirty_clusters.clear()
+
+    def save(self, file_name: str) -> None:
+        """Saves the abstract graph to the file (see graph_file_name)."""
+        self.__update()
+        numbers = array('i', [sum(len(entrances) for entrances in self.__borders.values())])
+        for entrances in self.__borders.values():
+            for first, second in entrances:
+                numbers.extend((first.width, first.height, second.width, second.height))
+        for cluster_y in range(self.rows):
+            for cluster_x in range(self.columns):
+                distances = self.__distances[(cluster_x, cluster_y)]
+                entrances = list(distances)
+                numbers.append(len(entrances))
+                for entrance in entrances:
+                    numbers.extend(entrance)
+                for entrance in entrances:
+                    numbers.extend(distances[entrance].get(other, -1) for other in entrances)
+        if sys.byteorder != 'little':
+            numbers.byteswap()
+        # the graph is written to a temporary file and moved over the old one, so an interrupted save
+        # doesn't leave a file with valid header and truncated graph
+        temporary_name = file_name + '.tmp'
+        try:
+            with open(temporary_name, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, self.cluster_size, self.maze.width,
+                                       self.maze.height, zlib.crc32(self.__free)))
+                numbers.tofile(file)
+            os.replace(temporary_name, file_name)
+        except BaseException:
+            if os.path.exists(temporary_name):
+                os.remove(temporary_name)
+            raise
+
+    def load(self, file_name: str) -> bool:
+        """Loads the abstract graph from the file. Returns False if the graph was built for other walls,
+        maze size or cluster size or the file is truncated, the planner is not changed then."""
+        free = free_cells(self.maze.grid)
+        with open(file_name, 'rb') as file:
+            header = file.read(HEADER.size)
+            data = file.read()
+        if len(header) < HEADER.size:
+            return False
+        magic, version, _, cluster_size, width, height, checksum = HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{file_name} is not an abstract graph file of version {FORMAT_VERSION}')
+        if (cluster_size, width, height, checksum) != (self.cluster_size, self.maze.width, self.maze.height,
+                                                       zlib.crc32(free)):
+            return False
+        numbers = array('i')
+        if len(data) % numbers.itemsize:
+            return False
+        numbers.frombytes(data)
+        if sys.byteorder != 'little':
+            numbers.byteswap()
+        graph = self.__parse_graph(numbers)
+        if graph is None:
+            return False
+        pairs, distances = graph
+        self.__free = free
+        self.__borders, self.__partners, self.__distances, self.__edges = {}, {}, {}, {}
+        for border, entrances in pairs.items():
+            self.__set_border(border, entrances)
+        for cluster, cluster_distances in distances.items():
+            self.__set_distances(cluster, cluster_distances)
+        self.__dirty_clusters.clear()
+        self.__rebuild_required = False
+        return True
+
+    def __parse_graph(self, numbers: array) -> Optional[Tuple[Dict[Border, List[Tuple[Coords, Coords]]],
+                                                              Dict[Cluster, Dict[Coords, Dict[Coords, int]]]]]:
+        """Parses numbers of the graph file into entrance pairs of borders and distances of clusters.
+        Returns None if the numbers are truncated, have extra numbers at the end or cells out of the maze."""
+        numbers = iter(numbers)
+        pairs: Dict[Border, List[Tuple[Coords, Coords]]] = {}
+        distances: Dict[Cluster, Dict[Coords, Dict[Coords, int]]] = {}
+
+        def read_cell() -> Coords:
+            cell = Coords(next(numbers), next(numbers))
+            if not (0 <= cell.width < self.maze.width and 0 <= cell.height < self.maze.height):
+                raise ValueError(f'cell {cell} is out of the maze')
+            return cell
+
+        try:
+            for _ in range(next(numbers)):
+                first, second = read_cell(), read_cell()
+                cluster_x, cluster_y = self.__cluster_of(first)
+                pairs.setdefault((cluster_x, cluster_y, first.height != second.height), []).append((first, second))
+            for cluster_y in range(self.rows):
+                for cluster_x in range(self.columns):
+                    size = next(numbers)
+                    entrances = [read_cell() for _ in range(size)]
+                    distances[(cluster_x, cluster_y)] = {
+                        entrance: {other: distance for other, distance in zip(entrances, [next(numbers)
+                                                                                          for _ in range(size)])
+                                   if distance >= 0 and other != entrance}
+                        for entrance in entrances}
+        except (StopIteration, ValueError):
+            return None
+        if next(numbers, None) is not None:
+            return None
+        return pairs, distances
+
+    def __search_in_cluster(self, source: Coords, target: Coords, cluster: Cluster) -> List[Coords]:
+        """A* that doesn't leave the cluster. Returns cells after source up to target (included)."""
+        left, top, right, down = self.__bounds(cluster)
+        width, free = self.maze.width, self.__free
+        goal = target.height * width + target.width
+        start = source.height * width + source.width
+        parents, costs, counter = {start: None}, {start: 0}, count()
+        heap = [(0, next(counter), start)]
+        while heap:
+            _, _, index = heapq.heappop(heap)
+            if index == goal:
+                break
+            y, x = divmod(index, width)
+            for neighbour, inside in ((index - 1, x > left), (index + 1, x + 1 < right),
+                                      (index - width, y > top), (index + width, y + 1 < down)):
+                cost = costs[index] + 1
+                if inside and free[neighbour] and cost < costs.get(neighbour, cost + 1):
+                    costs[neighbour], parents[neighbour] = cost, index
+                    neighbour_y, neighbour_x = divmod(neighbour, width)
+                    rating = cost + abs(neighbour_x - target.width) + abs(neighbour_y - target.height)
+                    heapq.heappush(heap, (rating, next(counter), neighbour))
+        cells, index = [], goal
+        while index != start:
+            cells.append(Coords(index % width, index // width))
+            index = parents[index]
+        return cells[::-1]
+
+    def find_path(self, start: Optional[Coords] = None,
+                  destination: Optional[Coords] = None) -> (List[Node], List[Node]):
+        """
+        Finds path through the abstract graph and refines it to cells.
+        :param start: start cell, agent position by default.
+        :param destination: destination cell, maze destination by default.
+        :return: List of expanded abstract graph nodes, list of cells for found path (find_path format) or [].
+        """
+        self.__update()
+        start = start or self.maze.get_agent_coords()
+        destination = destination or self.maze.get_destination_coords()
+        if not all((start, destination)):
+            return [], []
+        start, destination = Coords(*start), Coords(*destination)
+        start_cluster, destination_cluster = self.__cluster_of(start), self.__cluster_of(destination)
+        start_targets = self.__entrances(start_cluster)
+        if start_cluster == destination_cluster:
+            start_targets.add(destination)
+        start_edges = self.__cluster_distances(start, start_targets, start_cluster)
+        destination_edges = self.__cluster_distances(destination, self.__entrances(destination_cluster),
+                                                     destination_cluster)
+
+        destination_x, destination_y = destination
+        graph = self.__edges
+        # ties are broken towards the destination, many abstract paths have the same length
+        distance_left = abs(start.width - destination_x) + abs(start.height - destination_y)
+        costs, parents, counter = {start: 0}, {start: None}, count()
+        heap, moves = [(distance_left, distance_left, next(counter), start)], []
+        while heap:
+            rating, distance_left, _, cell = heapq.heappop(heap)
+            if cell == destination:
+                break
+            cell_cost = costs[cell]
+            if rating - distance_left != cell_cost:
+                continue  # the cell was reached again by a shorter path
+            moves.append(Node(cell, parents[cell]))
+            edges = graph.get(cell, [])
+            if cell == start:
+                edges = edges + list(start_edges.items())
+            if cell in destination_edges:
+                edges = edges + [(destination, destination_edges[cell])]
+            for neighbour, distance in edges:
+                cost = cell_cost + distance
+                if cost < costs.get(neighbour, cost + 1):
+                    costs[neighbour], parents[neighbour] = cost, cell
+                    x, y = neighbour
+                    distance_left = abs(x - destination_x) + abs(y - destination_y)
+                    heapq.heappush(heap, (cost + distance_left, distance_left, next(counter), neighbour))
+        if destination not in parents:
+            return moves, []
+        waypoints, cell = [], destination
+        while cell is not None:
+            waypoints.append(cell)
+            cell = parents[cell]
+        cells = []
+        for source, target in zip(waypoints[:0:-1], waypoints[-2::-1]):
+            cluster = self.__cluster_of(source)
+            if cluster != self.__cluster_of(target):
+                cells.append(target)  # step between neighbouring clusters
+            elif source != target:
+                cells.extend(self.__search_in_cluster(source, target, cluster))
+        return moves, nodes_from_cells(cells[:-1])  # start and destination are not the part of the path
@@ -0,0 +1,155 @@
+import heapq
+from itertools import count
+from math import inf
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import GridSymbols
+from maze import Maze
+from search_path import Coords, Node, nodes_from_cells
+
+Key = Tuple[float, float]
+
+
+class IncrementalPlanner:
+    """D* Lite planner bound to a Maze. The planner subscribes to maze changes and keeps its previous search,
+    so after walls are added or removed only the cells whose distance to the destination changed are expanded again.
+    The agent may move between plans without restarting the search. Changing the destination, clearing
+    or loading the maze restarts it.
+    Only walls block the plan, see grid.free_cells."""
+
+    def __init__(self, maze: Maze):
+        self.maze = maze
+        self.__goal: Optional[Coords] = None
+        self.__start: Optional[Coords] = None
+        self.__km = 0  # sum of heuristic distances the agent has moved since the search was started
+        self.__g: Dict[Coords, float] = {}
+        self.__rhs: Dict[Coords, float] = {}
+        self.__open: Dict[Coords, Key] = {}  # cells in the priority queue and their current keys
+        self.__heap = []
+        self.__counter = count()
+        self.__changed_cells: Set[Coords] = set()
+        self.__reset_required = True
+        maze.add_change_listener(self.__on_maze_change)
+
+    def close(self) -> None:
+        """Unsubscribes the planner from maze changes."""
+        self.maze.remove_change_listener(self.__on_maze_change)
+
+    def __on_maze_change(self, coords: Optional[Tuple[int, int]]) -> None:
+        if coords is None:
+            self.__reset_required = True
+        else:
+            self.__changed_cells.add(Coords(*coords))
+
+    @staticmethod
+    def __heuristic(first: Coords, second: Coords) -> int:
+        return abs(first.width - second.width) + abs(first.height - second.height)
+
+    def __is_free(self, cell: Coords) -> bool:
+        return self.maze.grid[cell.height][cell.width] != GridSymbols.WALL.value
+
+    def __neighbours(self, cell: Coords) -> List[Coords]:
+        """Returns cells around given cell (4-neighbourhood) that are inside the maze."""
+        neighbours = []
+        for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+            x, y = cell.width + dx, cell.height + dy
+            if 0 <= x < self.maze.width and 0 <= y < self.maze.height:
+                neighbours.append(Coords(x, y))
+        return neighbours
+
+    def __cost(self, first: Coords, second: Coords) -> float:
+        return 1 if self.__is_free(first) and self.__is_free(second) else inf
+
+    def __calculate_key(self, cell: Coords) -> Key:
+        cost = min(self.__g.get(cell, inf), self.__rhs.get(cell, inf))
+        return cost + self.__heuristic(self.__start, cell) + self.__km, cost
+
+    def __push(self, cell: Coords, key: Key) -> None:
+        self.__open[cell] = key
+        heapq.heappush(self.__heap, (key, next(self.__counter), cell))
+
+    def __top(self) -> Tuple[Key, Optional[Coords]]:
+        """Returns the smallest key in the queue and its cell. Drops heap entries that are no longer valid."""
+        while self.__heap:
+            key, _, cell = self.__heap[0]
+            if self.__open.get(cell) == key:
+                return key, cell
+            heapq.heappop(self.__heap)
+        return (inf, inf), None
+
+    def __update_vertex(self, cell: Coords) -> None:
+        if cell != self.__goal:
+            self.__rhs[cell] = min((self.__cost(cell, neighbour) + self.__g.get(neighbour, inf)
+                                    for neighbour in self.__neighbours(cell)), default=inf)
+        self.__open.pop(cell, None)
+        if self.__g.get(cell, inf) != self.__rhs.get(cell, inf):
+            self.__push(cell, self.__calculate_key(cell))
+
+    def __reset(self) -> None:
+        self.__goal = Coords(*self.maze.get_destination_coords())
+        self.__start = Coords(*self.maze.get_agent_coords())
+        self.__km = 0
+        self.__g, self.__rhs, self.__open, self.__heap = {}, {self.__goal: 0}, {}, []
+        self.__push(self.__goal, (self.__heuristic(self.__start, self.__goal), 0))
+        self.__changed_cells.clear()
+        self.__reset_required = False
+
+    def __apply_changes(self) -> None:
+        """Updates cells whose edge costs were changed by maze edits since the last plan."""
+        for cell in self.__changed_cells:
+            for affected in [cell] + self.__neighbours(cell):
+                self.__update_vertex(affected)
+        self.__changed_cells.clear()
+
+    def __compute_shortest_path(self) -> List[Node]:
+        """Expands cells until the agent distance is consistent. Returns expanded cells."""
+        moves = []
+        while True:
+            key, cell = self.__top()
+            if cell is None or (key >= self.__calculate_key(self.__start)
+                                and self.__rhs.get(self.__start, inf) <= self.__g.get(self.__start, inf)):
+                return moves
+            new_key = self.__calculate_key(cell)
+            if key < new_key:
+                self.__push(cell, new_key)
+                continue
+            del self.__open[cell]
+            moves.append(Node(cell, None))
+            if self.__g.get(cell, inf) > self.__rhs.get(cell, inf):
+                self.__g[cell] = self.__rhs[cell]
+                for neighbour in self.__neighbours(cell):
+                    self.__update_vertex(neighbour)
+            else:
+                self.__g[cell] = inf
+                for affected in [cell] + self.__neighbours(cell):
+                    self.__update_vertex(affected)
+
+    def __extract_path(self) -> List[Node]:
+        """Follows the cheapest neighbours from the agent to the destination. Returns path in find_path format."""
+        if self.__rhs.get(self.__start, inf) == inf:
+            return []
+        cells, cell = [], self.__start
+        while True:
+            cell = min(self.__neighbours(cell), key=lambda neighbour: self.__cost(cell, neighbour)
+                       + self.__g.get(neighbour, inf))
+            if cell == self.__goal or len(cells) > self.maze.width * self.maze.height:
+                break
+            cells.append(cell)
+        return nodes_from_cells(cells)
+
+    def plan(self) -> (List[Node], List[Node]):
+        """
+        Repairs the previous plan after maze changes and agent moves.
+        :return: List of cells expanded by this repair, list of cells for found path (find_path format) or [].
+        """
+        agent, destination = self.maze.get_agent_coords(), self.maze.get_destination_coords()
+        if not all((agent, destination)):
+            self.__reset_required = True
+            return [], []
+        if self.__reset_required or Coords(*destination) != self.__goal:
+            self.__reset()
+        elif Coords(*agent) != self.__start:
+            self.__km += self.__heuristic(self.__start, Coords(*agent))
+            self.__start = Coords(*agent)
+        self.__apply_changes()
+        return self.__compute_shortest_path(), self.__extract_path()
@@ -19,6 +19,7 @@ def main():
                 running = False
             else:
                 scene.handle_events(event)
+        scene.update()
         scene.render()
     pygame.quit()
 
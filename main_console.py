@@ -4,7 +4,16 @@ from time import sleep
 from typing import List
 
 import search_path
-from search_path import find_path_select_mode
+from config import SearchEventKinds
+from grid import Grid, np
+from maze_format import load_any
+
+try:
+    from tiled_grid import TiledGrid
+except ImportError:  # tiled grids need NumPy
+    TiledGrid = None
+from search_path import WEIGHTED_MODES, iter_find_path, select_search_mode
+from search_stats import SearchStats
 
 
 class Color:
@@ -18,38 +27,46 @@ class Color:
     RESET = '\x1b[0m'
 
 
-def load_maze(file_name: str) -> List[List[int]]:
-    """load the maze from a file"""
+def load_maze(file_name: str, use_numpy: bool = False, tiled: bool = False, mode: str = 'r') -> Grid:
+    """load the maze from a text or binary file (see maze_format). Returns uint8 NumPy array if use_numpy is set
+    (memory-mapped for not packed binary files, mode is the memory map mode), TiledGrid that pages the binary file
+    in by tiles if tiled is set or nested list of integers."""
     if not file_name or not os.path.exists(file_name):
         raise FileExistsError
-    with open(file_name, "r") as file:
-        return [[int(char) for char in line.strip()] for line in file]
+    if tiled:
+        if TiledGrid is None:
+            raise ImportError('NumPy is required for tiled grids')
+        return TiledGrid(file_name)
+    return load_any(file_name, use_numpy, mode)
 
 
-def draw_maze_numbers(maze_: List[List[int]]) -> None:
+def draw_maze_numbers(maze_: Grid) -> None:
     """Draw maze numbers."""
     os.system('cls||clear')
     for line in maze_:
         print(*line)
 
 
-def draw_maze(maze_: List[List[int]]) -> None:
+def draw_maze(maze_: Grid) -> None:
     """Draw maze in console using colors and special symbols."""
-    wall, path, start = '■', '◆', '●'
+    wall, path, start, terrain = '■', '◆', '●', '░'
     cell_styles = {
         0: ' ',  # free cell
         1: Color.BLUE + wall + Color.RESET,  # wall
         2: Color.YELLOW + path + Color.RESET,  # explored cells
         3: Color.PURPLE + path + Color.RESET,  # found path
         4: Color.GREEN + start + Color.RESET,  # start
-        5: Color.RED + start + Color.RESET  # finish / destination
+        5: Color.RED + start + Color.RESET,  # finish / destination
+        6: Color.YELLOW + terrain + Color.RESET,  # sand
+        7: Color.PURPLE + terrain + Color.RESET,  # mud
+        8: Color.CIAN + terrain + Color.RESET  # water
     }
     os.system('cls||clear')
     for line in maze_:
         print(*(cell_styles[char] for char in line))
 
 
-def __fill_cells(maze_:  List[List[int]], cells_fill_list: List[search_path.Node], fill_value: int, delay: float):
+def __fill_cells(maze_: Grid, cells_fill_list: List[search_path.Node], fill_value: int, delay: float):
     """
     Fills maze with fill_value for cells given in cells_fill_list. After single cell change redraws maze
     and wait for delay. Used to animate the search process and drawing of the found path.
@@ -69,12 +86,21 @@ def run(filename_: str) -> None:
     """Console application that allows to draw maze without using pygame. Loads maze from file.
     Asks to select search algorithm, solves the maze and animate the process of the search.
     Note: Pycharm console can't clear screen correctly, use standard Linux / Windows console."""
-    maze = load_maze(filename_)
+    maze = load_maze(filename_, use_numpy=np is not None, mode='c')  # copy on write: the search is painted in
     draw_maze(maze)
-    moves, path = find_path_select_mode(maze)
-    __fill_cells(maze, moves, 2, 0.01)
+    explored, path = 0, []
+    stats = SearchStats()
+    mode = select_search_mode()
+    # cells are drawn as the search explores them, terrain costs are used by the modes that support them
+    for event in iter_find_path(maze, mode, stats=stats, weighted=mode in WEIGHTED_MODES):
+        if event.kind == SearchEventKinds.EXPLORED:
+            explored += 1
+            __fill_cells(maze, [event.value], 2, 0.01)
+        else:
+            path = event.value
     __fill_cells(maze, path, 3, 0.01)
-    print(f'Explored cells: {len(moves)}, Path: {len(path)} cells.')
+    print(f'Explored cells: {explored}, Path: {len(path)} cells.')
+    print(stats.report())
 
 
 if __name__ == "__main__":
@@ -1,64 +1,220 @@
 import os
-from typing import List, Tuple, Optional
-from tkinter import filedialog
-from config import GridSymbols
-from search_path import find_path
+from typing import Callable, Dict, Iterator, Set, Tuple, Optional
+from components import ComponentIndex
+from config import GridSymbols, SearchEventKinds, Settings
+from grid import Grid, GridBackend, find_value, grid_size, is_array, new_grid, np, fill, replace_values
+from maze_format import is_binary_maze, load_binary, save_binary, save_text
+from path_cache import PathCache
+from search_path import SearchEvent, find_path, iter_find_path
+from search_stats import SearchStats
 
 
 class Maze:
-    def __init__(self, width: int, height: int):
-        self.__agent_coords: Optional[Tuple[int, int]] = None
-        self.__destination_coords: Optional[Tuple[int, int]] = None
+    def __init__(self, width: int, height: int, use_numpy: bool = False, grid: Optional[Grid] = None):
+        """Creates empty maze. Grid is stored as uint8 NumPy array if use_numpy is set or as nested list.
+        Existing grid of width x height cells (e.g. tiled_grid.TiledGrid) can be given instead,
+        agent and destination are found in it then."""
         self.width: int = width
         self.height: int = height
-        self.grid: List[List[int]] = [[0 for _ in range(self.width)] for _ in range(self.height)]  # maze 2D array
+        self.grid: Grid = grid if grid is not None else new_grid(self.width, self.height, use_numpy)  # maze 2D array
+        self.__agent_coords: Optional[Tuple[int, int]] = find_value(self.grid, GridSymbols.START.value) \
+            if grid is not None else None
+        self.__destination_coords: Optional[Tuple[int, int]] = find_value(self.grid, GridSymbols.DESTINATION.value) \
+            if grid is not None else None
+        self.version: int = 0  # bumped on every change of walls, agent or destination
+        self.path_cache = PathCache(Settings.PATH_CACHE_SIZE)
+        self.__change_listeners = []
+        self.__dirty_cells: Set[Tuple[int, int]] = set()  # cells changed since the last pop_dirty_cells call
+        self.__fully_dirty = True  # whole maze changed since the last pop_dirty_cells call
+        # lets solve report walled off destination without a search, grid backends don't get the index:
+        # labelling every cell would read the whole grid to memory
+        self.components: Optional[ComponentIndex] = None if isinstance(self.grid, GridBackend) \
+            else ComponentIndex(self)
+        self.__marked_terrain: Dict[Tuple[int, int], int] = {}  # terrain under explored and found path marks
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> 'Maze':
+        """Creates maze around existing grid."""
+        return cls(*grid_size(grid), grid=grid)
+
+    def add_change_listener(self, listener: Callable[[Optional[Tuple[int, int]]], None]) -> None:
+        """Subscribes listener to maze changes. Listener is called with (x, y) of the changed cell
+        or with None if the whole maze was changed (clear, load)."""
+        self.__change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[Optional[Tuple[int, int]]], None]) -> None:
+        self.__change_listeners.remove(listener)
+
+    def __mark_dirty(self, coords: Optional[Tuple[int, int]] = None) -> None:
+        """Records changed cell for redrawing or the whole maze if coords is None."""
+        if coords is None:
+            self.__fully_dirty = True
+            self.__dirty_cells.clear()
+        elif not self.__fully_dirty:
+            self.__dirty_cells.add(coords)
+
+    def pop_dirty_cells(self) -> Optional[Set[Tuple[int, int]]]:
+        """Returns (x, y) of cells changed since the previous call and resets the record.
+        Returns None if the whole maze has to be redrawn."""
+        dirty_cells = None if self.__fully_dirty else self.__dirty_cells
+        self.__dirty_cells = set()
+        self.__fully_dirty = False
+        return dirty_cells
+
+    def __bump_version(self, coords: Optional[Tuple[int, int]] = None) -> None:
+        """Marks maze as changed, so search results cached for previous versions are never served,
+        and notifies change listeners."""
+        self.version += 1
+        self.__mark_dirty(coords)
+        for listener in self.__change_listeners:
+            listener(coords)
 
     def clear(self):
         """Clear the maze"""
-        self.grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
+        fill(self.grid, GridSymbols.EMPTY.value)
+        self.__marked_terrain.clear()
         self.__agent_coords = None
         self.__destination_coords = None
+        self.__bump_version()
+
+    def solve(self, search_algorythm: str, stats: Optional[SearchStats] = None, diagonal: bool = False,
+              weighted: bool = False):
+        """Finds path from agent to destination. Explored cells and found path marks are wiped before the search.
+        Results are cached by (maze version, agent, destination, algorythm, movement), see path_cache.cache_info().
+        Search counters and timers are collected to stats if it is given (see search_stats.SearchStats).
+        diagonal allows 8-connected moves, weighted makes terrain cost Settings.TERRAIN_COSTS (see find_path)."""
+        self.clear_explored()
+        key = (self.version, self.get_agent_coords(), self.get_destination_coords(), search_algorythm, diagonal,
+               weighted)
+        result = self.path_cache.get(key)
+        if result is None:
+            result = find_path(self.grid, search_algorythm, self.get_agent_coords(), self.get_destination_coords(),
+                               self.components, stats, diagonal, weighted)
+            self.path_cache.put(key, result)
+        elif stats is not None:
+            Maze.__set_cached_stats(stats, search_algorythm, result)
+        return result
+
+    @staticmethod
+    def __set_cached_stats(stats: SearchStats, search_algorythm: str, result: tuple) -> None:
+        moves, path = result
+        stats.mode, stats.cached, stats.expanded, stats.path_length = search_algorythm, True, len(moves), len(path)
 
-    def solve(self, search_algorythm: str):
-        return find_path(self.grid, search_algorythm)
+    def iter_solve(self, search_algorythm: str, max_expansions: Optional[int] = None,
+                   stats: Optional[SearchStats] = None, diagonal: bool = False,
+                   weighted: bool = False) -> Iterator[SearchEvent]:
+        """Streaming variant of solve, see search_path.iter_find_path. Cached result is replayed if there is one
+        (with the same max_expansions rule as the search), otherwise the search runs lazily as events are consumed.
+        Result of the search that ran to the end is cached like in solve if it inspected at most
+        Settings.STREAM_CACHE_MAX_EXPLORED cells, so streaming large searches doesn't keep every inspected node.
+        Stopped searches and searches outlived by maze changes are not cached."""
+        self.clear_explored()
+        key = (self.version, self.get_agent_coords(), self.get_destination_coords(), search_algorythm, diagonal,
+               weighted)
+        result = self.path_cache.get(key)
+        if result is None:
+            moves = []
+            for event in iter_find_path(self.grid, search_algorythm, self.get_agent_coords(),
+                                        self.get_destination_coords(), max_expansions, components=self.components,
+                                        stats=stats, diagonal=diagonal, weighted=weighted):
+                if event.kind == SearchEventKinds.EXPLORED and moves is not None:
+                    moves.append(event.value)
+                    if len(moves) > Settings.STREAM_CACHE_MAX_EXPLORED:
+                        moves = None  # too large to cache, inspected nodes are not kept
+                elif event.kind == SearchEventKinds.PATH and moves is not None and self.version == key[0]:
+                    self.path_cache.put(key, (moves, event.value))
+                yield event
+            return
+        if stats is not None:
+            Maze.__set_cached_stats(stats, search_algorythm, result)
+        moves, path = result
+        for node in moves[:max_expansions]:
+            yield SearchEvent(SearchEventKinds.EXPLORED, node)
+        if max_expansions is not None and len(moves) > max_expansions:
+            yield SearchEvent(SearchEventKinds.STOPPED, [])
+        else:
+            yield SearchEvent(SearchEventKinds.PATH, path)
 
     def save(self):
-        """Save the maze to a file"""
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt")])
+        """Save the maze to a text file or to a binary file if .maze extension is selected"""
+        from tkinter import filedialog  # imported on use, so headless code doesn't pay for tkinter
+        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"),
+                                                                                     ("Binary mazes", "*.maze")])
         if file_path:
-            with open(file_path, "w") as file:
-                for row in self.grid:
-                    for cell in row:
-                        file.write(str(cell))
-                    file.write("\n")
+            if os.path.splitext(file_path)[1] == ".maze":
+                save_binary(file_path, self.grid)
+            else:
+                save_text(file_path, self.grid)
 
     def load(self):
-        """load the maze from a file"""
-        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
+        """load the maze from a text or binary file"""
+        from tkinter import filedialog
+        file_path = filedialog.askopenfilename(filetypes=[("Maze files", "*.txt *.maze")])
         if file_path and os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                for y, line in enumerate(file):
-                    for x, char in enumerate(line.strip()):
-                        if y < self.height and x < self.width:
-                            char = int(char)
-                            self.grid[y][x] = char
-                            if char == GridSymbols.START.value:
-                                self.set_agent_coords(x, y)
-                            elif char == GridSymbols.DESTINATION.value:
-                                self.set_destination_coords(x, y)
+            self.__marked_terrain.clear()
+            if is_binary_maze(file_path) and np is not None:
+                self.__load_cells(load_binary(file_path))
+                self.__bump_version()
+                return
+            if is_binary_maze(file_path):
+                rows = load_binary(file_path, use_numpy=False)
+            else:
+                with open(file_path, "r") as file:
+                    rows = [line.strip() for line in file]
+            for y, line in enumerate(rows):
+                for x, char in enumerate(line):
+                    if y < self.height and x < self.width:
+                        char = int(char)
+                        self.grid[y][x] = char
+                        if char == GridSymbols.START.value:
+                            self.set_agent_coords(x, y)
+                        elif char == GridSymbols.DESTINATION.value:
+                            self.set_destination_coords(x, y)
+            self.__bump_version()
+
+    def __load_cells(self, cells: 'np.ndarray') -> None:
+        """Copies cells of memory-mapped binary maze to the grid row by row, cells out of the maze are skipped."""
+        height, width = min(cells.shape[0], self.height), min(cells.shape[1], self.width)
+        cells = cells[:height, :width]
+        if is_array(self.grid):
+            self.grid[:height, :width] = cells
+        else:
+            for y, row in enumerate(cells.tolist()):
+                if isinstance(self.grid, list):
+                    self.grid[y][:width] = row
+                else:
+                    for x, cell in enumerate(row):
+                        self.grid[y][x] = cell
+        self.__agent_coords = find_value(cells, GridSymbols.START.value)
+        self.__destination_coords = find_value(cells, GridSymbols.DESTINATION.value)
 
     def __set_grid_value(self, x: int, y: int, item: int):
-        if all((x >= 0, x < self.width, y >= 0, y < self.height)):
+        if all((x >= 0, x < self.width, y >= 0, y < self.height)) and self.grid[y][x] != item:
             self.grid[y][x] = item
+            self.__marked_terrain.pop((x, y), None)
+            self.__bump_version((x, y))
 
     def set_wall(self, x: int, y: int) -> None:
         self.__set_grid_value(x, y, GridSymbols.WALL.value)
 
-    # def set_explored(self, x: int, y: int) -> None:
-    #     self.__set_grid_value(x, y, GridSymbols.EXPLORED.value)
-    #
-    # def set_path_found(self, x: int, y: int) -> None:
-    #     self.__set_grid_value(x, y, GridSymbols.PATH.value)
+    def set_terrain(self, x: int, y: int, terrain: int) -> None:
+        """Sets terrain cell (GridSymbols.SAND, MUD or WATER value)."""
+        self.__set_grid_value(x, y, terrain)
+
+    def __set_mark(self, x: int, y: int, item: int):
+        """Sets display only value (explored cell or found path), that doesn't change maze version.
+        Terrain under the mark is restored by clear_explored."""
+        if all((x >= 0, x < self.width, y >= 0, y < self.height)):
+            if self.grid[y][x] in Settings.TERRAIN_COSTS:
+                self.__marked_terrain[(x, y)] = self.grid[y][x]
+            self.grid[y][x] = item
+            self.__mark_dirty((x, y))
+
+    def set_explored(self, x: int, y: int) -> None:
+        self.__set_mark(x, y, GridSymbols.EXPLORED.value)
+
+    def set_path_found(self, x: int, y: int) -> None:
+        self.__set_mark(x, y, GridSymbols.PATH.value)
 
     def clear_cell(self, x: int, y: int) -> None:
         if (x, y) == self.get_agent_coords():
@@ -69,7 +225,11 @@ class Maze:
 
     def clear_explored(self) -> None:
         wiping_items = (GridSymbols.EXPLORED.value, GridSymbols.PATH.value)
-        self.grid = [[0 if char in wiping_items else char for char in line] for line in self.grid]
+        replace_values(self.grid, wiping_items, GridSymbols.EMPTY.value)
+        for (x, y), terrain in self.__marked_terrain.items():
+            self.grid[y][x] = terrain
+        self.__marked_terrain.clear()
+        self.__mark_dirty()
 
     def set_agent_coords(self, x: int, y: int) -> None:
         if self.grid[y][x] != GridSymbols.WALL.value and self.__destination_coords != (x, y):
@@ -0,0 +1,144 @@
+import os
+import struct
+import sys
+from collections import namedtuple
+
+from config import GridSymbols, Settings
+from grid import Grid, find_value, grid_from_rows, grid_size, np, wall_mask
+
+# Binary maze file: 32 bytes header followed by cells payload.
+# Header (little-endian): magic, format version, flags, reserved, width, height, start x, y, destination x, y
+# (-1 if there is no start / destination).
+# Payload: one uint8 per cell row by row or, with PACKED_WALLS flag, wall layer packed to bits
+# (row by row, the highest bit first); start and destination are restored from the header then.
+MAGIC = b'MAZB'
+FORMAT_VERSION = 1
+PACKED_WALLS = 1
+HEADER = struct.Struct('<4sBBHIIiiii')
+
+MazeHeader = namedtuple('MazeHeader', ['width', 'height', 'start', 'destination', 'packed'])
+
+
+def is_binary_maze(file_name: str) -> bool:
+    """Checks whether file starts with binary maze magic bytes."""
+    with open(file_name, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_header(file_name: str) -> MazeHeader:
+    with open(file_name, 'rb') as file:
+        data = file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f'{file_name} is not a binary maze file')
+    magic, version, flags, _, width, height, start_x, start_y, destination_x, destination_y = HEADER.unpack(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f'{file_name} is not a binary maze file of version {FORMAT_VERSION}')
+    start = (start_x, start_y) if start_x >= 0 else None
+    destination = (destination_x, destination_y) if destination_x >= 0 else None
+    return MazeHeader(width, height, start, destination, bool(flags & PACKED_WALLS))
+
+
+def save_binary(file_name: str, grid: Grid, packed: bool = False) -> None:
+    """Saves grid to binary maze file. Packed file keeps only walls, start and destination,
+    ValueError is raised for packing grid with terrain cells."""
+    width, height = grid_size(grid)
+    start = find_value(grid, GridSymbols.START.value) or (-1, -1)
+    destination = find_value(grid, GridSymbols.DESTINATION.value) or (-1, -1)
+    if packed and any(find_value(grid, terrain) for terrain in Settings.TERRAIN_COSTS):
+        raise ValueError('Packed binary maze keeps only walls, grid with terrain cells has to be saved not packed')
+    if np is not None:
+        cells = np.asarray(grid, dtype=np.uint8)
+        payload = np.packbits(wall_mask(cells)).tobytes() if packed else cells.tobytes()
+    else:
+        cells = [cell for row in grid for cell in row]
+        if packed:
+            walls = [cell == GridSymbols.WALL.value for cell in cells] + [False] * (-len(cells) % 8)
+            payload = bytes(sum(bit << (7 - shift) for shift, bit in enumerate(walls[index:index + 8]))
+                            for index in range(0, len(walls), 8))
+        else:
+            payload = bytes(cells)
+    with open(file_name, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, PACKED_WALLS if packed else 0, 0, width, height,
+                               *start, *destination))
+        file.write(payload)
+
+
+def load_binary(file_name: str, mode: str = 'r', use_numpy: bool = True) -> Grid:
+    """
+    Loads binary maze file. Not packed file is memory-mapped with NumPy, so loading doesn't read or copy the cells.
+    :param mode: memory map mode: 'r' - read only, 'c' - copy on write (grid is writable, file isn't changed),
+                 'r+' - changes are written to the file.
+    :param use_numpy: return uint8 NumPy array (memory-mapped if the file is not packed) or nested list of integers.
+    """
+    header = read_header(file_name)
+    cells_count = header.width * header.height
+    if use_numpy and np is None:
+        raise ImportError('NumPy is required for array grids')
+    if use_numpy and not header.packed:
+        return np.memmap(file_name, dtype=np.uint8, mode=mode, offset=HEADER.size,
+                         shape=(header.height, header.width))
+    with open(file_name, 'rb') as file:
+        file.seek(HEADER.size)
+        payload = file.read()
+    if np is not None:
+        if header.packed:
+            cells = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=cells_count)
+        else:
+            cells = np.frombuffer(payload, dtype=np.uint8, count=cells_count).copy()
+        cells = cells.reshape(header.height, header.width)
+        for position, value in ((header.start, GridSymbols.START.value),
+                                (header.destination, GridSymbols.DESTINATION.value)):
+            if header.packed and position:
+                cells[position[1], position[0]] = value
+        return cells if use_numpy else cells.tolist()
+    if header.packed:
+        cells = [(payload[index >> 3] >> (7 - (index & 7))) & 1 for index in range(cells_count)]
+    else:
+        cells = list(payload[:cells_count])
+    grid = [cells[y * header.width:(y + 1) * header.width] for y in range(header.height)]
+    for position, value in ((header.start, GridSymbols.START.value),
+                            (header.destination, GridSymbols.DESTINATION.value)):
+        if header.packed and position:
+            grid[position[1]][position[0]] = value
+    return grid
+
+
+def save_text(file_name: str, grid: Grid) -> None:
+    """Saves grid to text file: one digit per cell, one line per row."""
+    with open(file_name, 'w') as file:
+        for row in grid:
+            file.write(''.join(str(cell) for cell in row) + '\n')
+
+
+def load_text(file_name: str, use_numpy: bool = False) -> Grid:
+    with open(file_name, 'r') as file:
+        return grid_from_rows([line.strip() for line in file if line.strip()], use_numpy)
+
+
+def load_any(file_name: str, use_numpy: bool = False, mode: str = 'r') -> Grid:
+    """Loads text or binary maze file, the format is detected by the file content."""
+    if is_binary_maze(file_name):
+        return load_binary(file_name, mode, use_numpy)
+    return load_text(file_name, use_numpy)
+
+
+def convert(source: str, target: str, packed: bool = False) -> None:
+    """Converts maze file between text and binary formats. Target format is selected by extension:
+    .txt - text, anything else - binary."""
+    grid = load_any(source, use_numpy=np is not None)
+    if os.path.splitext(target)[1] == '.txt':
+        save_text(target, grid)
+    else:
+        save_binary(target, grid, packed)
+
+
+if __name__ == "__main__":
+    """Converter. Reads console arguments: source file, target file (.txt for text, .maze for binary)
+    and optional --packed flag to pack walls of binary file to bits."""
+    arguments = [argument for argument in sys.argv[1:] if argument != '--packed']
+    if len(arguments) != 2:
+        sys.exit('Usage: python maze_format.py SOURCE TARGET [--packed]')
+    try:
+        convert(*arguments, packed='--packed' in sys.argv[1:])
+    except ValueError as error:
+        sys.exit(str(error))
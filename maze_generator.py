@@ -0,0 +1,87 @@
+import random
+from typing import List
+
+from config import GridSymbols
+
+WALL, EMPTY = GridSymbols.WALL.value, GridSymbols.EMPTY.value
+
+
+def __place_ends(grid: List[List[int]]) -> List[List[int]]:
+    """Puts start to the top left corner and destination to the bottom right corner of the grid."""
+    grid[0][0] = GridSymbols.START.value
+    grid[-1][-1] = GridSymbols.DESTINATION.value
+    return grid
+
+
+def open_grid(width: int, height: int, seed: int = 0) -> List[List[int]]:
+    """Returns maze grid without walls, start in the top left corner and destination in the bottom right one."""
+    return __place_ends([[EMPTY for _ in range(width)] for _ in range(height)])
+
+
+def random_obstacles(width: int, height: int, seed: int = 0, density: float = 0.25) -> List[List[int]]:
+    """Returns grid with single wall cells placed randomly with given density."""
+    rnd = random.Random(seed)
+    return __place_ends([[WALL if rnd.random() < density else EMPTY for _ in range(width)] for _ in range(height)])
+
+
+def perfect_maze(width: int, height: int, seed: int = 0) -> List[List[int]]:
+    """Returns perfect maze (exactly one path between any two free cells) carved by randomized depth-first search.
+    Passages go through cells with even coordinates. The last row and column are opened for even sized grids,
+    so the destination corner is always connected."""
+    rnd = random.Random(seed)
+    grid = [[WALL for _ in range(width)] for _ in range(height)]
+    grid[0][0] = EMPTY
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        neighbours = [(x + dx, y + dy) for dx, dy in ((0, 2), (2, 0), (0, -2), (-2, 0))
+                      if 0 <= x + dx < width and 0 <= y + dy < height and grid[y + dy][x + dx] == WALL]
+        if not neighbours:
+            stack.pop()
+            continue
+        next_x, next_y = rnd.choice(neighbours)
+        grid[(y + next_y) // 2][(x + next_x) // 2] = EMPTY
+        grid[next_y][next_x] = EMPTY
+        stack.append((next_x, next_y))
+    if width % 2 == 0:
+        for y in range(0, height, 2):
+            grid[y][width - 1] = EMPTY
+    if height % 2 == 0:
+        for x in range(0, width, 2):
+            grid[height - 1][x] = EMPTY
+    grid[height - 1][width - 1] = EMPTY
+    return __place_ends(grid)
+
+
+def open_rooms(width: int, height: int, seed: int = 0, room_size: int = 16) -> List[List[int]]:
+    """Returns grid split into big empty rooms by walls with one random door between every two neighbour rooms."""
+    rnd = random.Random(seed)
+    step = room_size + 1
+    grid = [[WALL if (x % step == room_size and x < width - 1) or (y % step == room_size and y < height - 1)
+             else EMPTY for x in range(width)] for y in range(height)]
+    for room_y in range(0, height, step):
+        for room_x in range(0, width, step):
+            if room_x + room_size < width - 1:
+                grid[rnd.randrange(room_y, min(room_y + room_size, height))][room_x + room_size] = EMPTY
+            if room_y + room_size < height - 1:
+                grid[room_y + room_size][rnd.randrange(room_x, min(room_x + room_size, width))] = EMPTY
+    return __place_ends(grid)
+
+
+def corridors(width: int, height: int, seed: int = 0) -> List[List[int]]:
+    """Returns worst case serpentine maze: horizontal corridors joined by alternating gaps at the left and right ends,
+    so the only path walks through the whole grid."""
+    grid = [[EMPTY for _ in range(width)] for _ in range(height)]
+    for number, wall_y in enumerate(range(1, height - 1, 2)):
+        grid[wall_y] = [WALL for _ in range(width)]
+        grid[wall_y][width - 1 if number % 2 == 0 else 0] = EMPTY
+    return __place_ends(grid)
+
+
+GENERATORS = {
+    'open': open_grid,
+    'obstacles': random_obstacles,
+    'perfect': perfect_maze,
+    'rooms': open_rooms,
+    'corridors': corridors,
+}
@@ -0,0 +1,42 @@
+from collections import OrderedDict, namedtuple
+from typing import Hashable, Optional
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class PathCache:
+    """Bounded cache of search results that evicts the least recently used entry when it is full.
+    Counts cache hits and misses."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Optional[tuple]:
+        """Returns cached value and marks it as recently used or returns None if key is not cached."""
+        value = self.__entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: tuple) -> None:
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries and resets counters."""
+        self.__entries.clear()
+        self.hits = self.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.__entries))
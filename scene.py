@@ -1,7 +1,10 @@
+from time import perf_counter
+
 import pygame
-from config import Colors, Settings, SceneDrawingModes, SearchAlgorithmModes, GridSymbols
+from config import Colors, Settings, SceneDrawingModes, SearchAlgorithmModes, GridSymbols, SearchEventKinds
 from maze import Maze
-from time import sleep
+from search_path import DIAGONAL_MODES, WEIGHTED_MODES
+from search_stats import SearchStats
 
 
 class Scene:
@@ -12,9 +15,16 @@ class Scene:
         self.font = pygame.font.SysFont('Arial', 15)  # Load font for drawing text
         self.drawing_mode = SceneDrawingModes.WALLS
         self.search_algorythm = SearchAlgorithmModes.BFS  # Selected search algorythm
+        self.diagonal_moves = False  # 8-connected moves for the search modes that support them
         self.erasing_mode = False  # Set erasing mode (right mouse button pressed)
         self.maze = Maze(*Scene.__get_grid_cords(*Settings.WINDOW_SIZE))
         self.mouse_pressed = False
+        self.background = pygame.Surface(Settings.WINDOW_SIZE)  # cached picture of the maze and labels
+        self.__labels_state = None  # values shown in the labels when they were drawn last time
+        self.__cursor_rect = None  # screen area covered by the cursor in the previous frame
+        self.animation_speed = Settings.ANIMATION_CELLS_PER_FRAME  # solve animation cells shown per frame
+        self.__animation = None  # iterator over remaining (cell setter, node) animation steps
+        self.search_stats = None  # counters and timers of the last solve, filled as the search runs
 
     @staticmethod
     def __get_grid_cords(x: int, y: int):
@@ -23,35 +33,51 @@ class Scene:
         grid_y = (y - Settings.LABEL_HEIGHT) // Settings.GRID_SIZE
         return grid_x, grid_y
 
-    def __draw_grid_rect(self, x: int, y: int, color: tuple):
+    @staticmethod
+    def __get_grid_rect(x: int, y: int) -> pygame.Rect:
+        """Returns screen area of the cell at a given grid position"""
+        return pygame.Rect(x * Settings.GRID_SIZE + 1, y * Settings.GRID_SIZE + Settings.LABEL_HEIGHT + 1,
+                           Settings.GRID_SIZE - 1, Settings.GRID_SIZE - 1)
+
+    def __draw_grid_rect(self, surface: pygame.Surface, x: int, y: int, color: tuple) -> pygame.Rect:
         """draw a rectangle at a given grid position"""
-        pygame.draw.rect(self.screen, color, (x * Settings.GRID_SIZE + 1, y * Settings.GRID_SIZE + 50 + 1,
-                                              Settings.GRID_SIZE - 1, Settings.GRID_SIZE - 1))
+        return pygame.draw.rect(surface, color, Scene.__get_grid_rect(x, y))
 
-    def __draw_maze(self):
-        """draw the maze"""
+    def __draw_cells(self, cells) -> list:
+        """draw given maze cells on the background, returns list of changed areas"""
         cell_colors = {
             GridSymbols.EMPTY.value: Settings.BACKGROUND_COLOR,
             GridSymbols.WALL.value: Settings.WALL_COLOR,
             GridSymbols.EXPLORED.value: Settings.EXPLORED_COLOR,
             GridSymbols.PATH.value: Settings.PATH_FOUND_COLOR,
             GridSymbols.START.value: Settings.AGENT_COLOR,
-            GridSymbols.DESTINATION.value: Settings.DESTINATION_COLOR
+            GridSymbols.DESTINATION.value: Settings.DESTINATION_COLOR,
+            **Settings.TERRAIN_COLORS
         }
-        for y in range(self.maze.height):
-            for x in range(self.maze.width):
-                self.__draw_grid_rect(x, y, cell_colors[self.maze.grid[y][x]])
+        return [self.__draw_grid_rect(self.background, x, y, cell_colors[self.maze.grid[y][x]]) for x, y in cells]
+
+    def __draw_maze(self):
+        """draw the maze"""
+        self.__draw_cells((x, y) for y in range(self.maze.height) for x in range(self.maze.width))
 
-    def __draw_key_definition(self):
+    def __draw_key_definition(self) -> pygame.Rect:
         """Draw key definition label"""
+        label_rect = pygame.draw.rect(self.background, Colors.WHITE, (0, 0, Settings.WINDOW_SIZE.width,
+                                                                      Settings.LABEL_HEIGHT))
         label1 = self.font.render(f"1: Drawing mode: {self.drawing_mode.name.capitalize()}", True, Colors.BLACK)
         label2 = self.font.render(f"L: Load empty, S: Save maze", True, Colors.BLACK)
         label3 = self.font.render(f"2: Search algorythm: {self.search_algorythm.value}", True, Colors.BLACK)
-        label4 = self.font.render(f"3: Solve maze!", True, Colors.BLACK)
-        self.screen.blit(label1, (10, 10))
-        self.screen.blit(label2, (10, 30))
-        self.screen.blit(label3, (250, 10))
-        self.screen.blit(label4, (250, 30))
+        label4 = self.font.render(f"3: Solve maze!  +/-: Animation speed, Space: Skip animation", True, Colors.BLACK)
+        label5 = self.font.render(f"4: Diagonal moves: {'On' if self.diagonal_moves else 'Off'}", True,
+                                  Colors.BLACK)
+        self.background.blit(label1, (10, 10))
+        self.background.blit(label2, (10, 30))
+        self.background.blit(label3, (250, 10))
+        self.background.blit(label4, (250, 30))
+        self.background.blit(label5, (620, 30))
+        if self.search_stats is not None:
+            self.background.blit(self.font.render(self.search_stats.summary(), True, Colors.BLACK), (560, 10))
+        return label_rect
 
     # Draw load button
     # def draw_load_button():
@@ -68,36 +94,85 @@ class Scene:
     # rect.center = (WIDTH // 2, HEIGHT - 25)
     # pygame.draw.rect(screen, GREEN, rect, border_radius=5)
     # screen.blit(label, rect)
-    def __draw_cursor(self):
+    def __draw_cursor(self) -> pygame.Rect:
         """Draw cursor"""
-        self.__draw_grid_rect(*Scene.__get_grid_cords(*pygame.mouse.get_pos()), Colors.GREEN)
+        return self.__draw_grid_rect(self.screen, *Scene.__get_grid_cords(*pygame.mouse.get_pos()), Colors.GREEN)
 
     def __solve_maze(self):
-
-        def fill_cells(cells_fill_list, fill_value, delay):
-            for cell_ in cells_fill_list:
-                self.maze.grid[cell_.coords.height][cell_.coords.width] = fill_value
-                self.render()
-                sleep(delay)
-
+        """Starts the solve animation. The search runs lazily: update() advances it as the cells are shown."""
         if not all((self.maze.get_agent_coords(), self.maze.get_destination_coords())):
             return
-        self.maze.clear_explored()
-        moves, path = self.maze.solve(self.search_algorythm.value)
-        fill_cells(moves, GridSymbols.EXPLORED.value, 0.005)
-        fill_cells(path, GridSymbols.PATH.value, 0)
+        self.search_stats = SearchStats()
+        mode = self.search_algorythm.value
+        search_events = self.maze.iter_solve(mode, stats=self.search_stats,
+                                             diagonal=self.diagonal_moves and mode in DIAGONAL_MODES,
+                                             weighted=mode in WEIGHTED_MODES)
+        self.__animation = self.__animation_steps(search_events)
+
+    def __animation_steps(self, search_events):
+        """Converts search events to (cell setter, node) animation steps"""
+        for event in search_events:
+            if event.kind == SearchEventKinds.EXPLORED:
+                yield self.maze.set_explored, event.value
+            elif event.kind == SearchEventKinds.PATH:
+                for node in event.value:
+                    yield self.maze.set_path_found, node
+
+    def __finish_animation(self):
+        """Skips to the end of the solve animation"""
+        if self.__animation is not None:
+            for fill_cell, node in self.__animation:
+                fill_cell(*node.coords)
+            self.__animation = None
+
+    def update(self):
+        """Advances the solve animation: shows up to animation_speed explored or path cells per frame,
+        but doesn't spend more than Settings.ANIMATION_TIME_BUDGET seconds on it."""
+        if self.__animation is None:
+            return
+        deadline = perf_counter() + Settings.ANIMATION_TIME_BUDGET
+        for _ in range(self.animation_speed):
+            step = next(self.__animation, None)
+            if step is None:
+                self.__animation = None
+                return
+            fill_cell, node = step
+            fill_cell(*node.coords)
+            if perf_counter() > deadline:
+                return
 
     def render(self):
-        self.screen.fill(Colors.WHITE)
-        self.__draw_maze()
-        self.__draw_cursor()
-        self.__draw_key_definition()
-        pygame.display.flip()  # Update the display
+        """Redraws changed maze cells, labels and cursor. The maze picture is kept on the background surface,
+        only changed areas are copied to the screen."""
+        dirty_cells = self.maze.pop_dirty_cells()
+        labels_state = (self.drawing_mode, self.search_algorythm, self.diagonal_moves,
+                        self.search_stats.summary() if self.search_stats is not None else None)
+        if dirty_cells is None:
+            self.background.fill(Colors.WHITE)
+            self.__draw_maze()
+            self.__draw_key_definition()
+            self.__labels_state = labels_state
+            self.screen.blit(self.background, (0, 0))
+            self.__cursor_rect = self.__draw_cursor()
+            pygame.display.flip()  # Update the display
+            return
+        changed_rects = self.__draw_cells(dirty_cells)
+        if labels_state != self.__labels_state:
+            changed_rects.append(self.__draw_key_definition())
+            self.__labels_state = labels_state
+        if self.__cursor_rect:
+            changed_rects.append(self.__cursor_rect)
+        for rect in changed_rects:
+            self.screen.blit(self.background, rect, rect)
+        self.__cursor_rect = self.__draw_cursor()
+        changed_rects.append(self.__cursor_rect)
+        pygame.display.update(changed_rects)  # Update changed areas of the display
 
     def handle_events(self, event):
         """Handle events in game"""
 
         def on_mousedown():
+            self.__animation = None  # stop the solve animation when the maze is edited
             # Set the mouse_pressed flag to True
             if event.button == 1:
                 self.mouse_pressed = True
@@ -124,6 +199,8 @@ class Scene:
                     self.maze.set_agent_coords(*grid_coords)
                 elif self.drawing_mode == SceneDrawingModes.DESTINATION:
                     self.maze.set_destination_coords(*grid_coords)
+                else:  # terrain drawing modes are named after GridSymbols terrain
+                    self.maze.set_terrain(*grid_coords, GridSymbols[self.drawing_mode.name].value)
 
         def on_keydown():
             # if event.unicode == "1":
@@ -134,10 +211,19 @@ class Scene:
                 self.search_algorythm = self.search_algorythm.next()
             elif event.key == pygame.K_3:
                 self.__solve_maze()
+            elif event.key == pygame.K_4:
+                self.diagonal_moves = not self.diagonal_moves
             elif event.key == pygame.K_s:
                 self.maze.save()
             elif event.key == pygame.K_l:
+                self.__animation = None
                 self.maze.load()
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.animation_speed = min(self.animation_speed * 2, Settings.ANIMATION_MAX_CELLS_PER_FRAME)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.animation_speed = max(self.animation_speed // 2, 1)
+            elif event.key == pygame.K_SPACE:
+                self.__finish_animation()
 
         if event.type == pygame.MOUSEBUTTONDOWN:
             on_mousedown()
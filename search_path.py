@@ -1,40 +1,89 @@
-from collections import namedtuple
-from typing import Optional, List
+import heapq
+import threading
+from collections import namedtuple, deque
+from functools import partial
+from itertools import count
+from math import hypot, sqrt
+from typing import Callable, Generator, Iterator, Optional, List
+
+from config import Heuristics, SearchAlgorithmModes, SearchEventKinds
+from grid import Grid, cell_costs, find_value, grid_size, passable_cells
+from search_stats import SearchStats
 
 Coords = namedtuple('Coords', ['width', 'height'])
+SearchEvent = namedtuple('SearchEvent', ['kind', 'value'])  # kind is SearchEventKinds member
+
+WEIGHTED_MODES = ('Greedy BFS', 'A*', 'Dijkstra')  # modes that support weighted terrain
+DIAGONAL_MODES = ('BFS', 'DFS', 'Greedy BFS', 'A*', 'Dijkstra')  # modes that support 8-connected moves
+DIAGONAL_COST = sqrt(2)
 
 
 class Node:
-    """Node class that stores coordinates of the cell, link to parent Node
-    and rating for Greedy BFS and A* algorithms."""
+    """Node class that stores coordinates of the cell, link to parent Node, walked path cost from the start
+    and rating for Greedy BFS, A* and Dijkstra algorithms. Cost is the number of steps for unit moves,
+    it is float for weighted terrain and diagonal moves.
+    Node uses __slots__, so it has no per-instance dict: the node with its Coords tuple takes about 200 bytes,
+    one expanded node costs about 300 bytes including its frontier and best cost entries
+    (see bench_node_memory in benchmark.py, measured on a large open grid)."""
+    __slots__ = ('coords', 'parent', 'rating', 'cost')
 
-    def __init__(self, coords: Coords, parent, rating: Optional[int] = None):
+    def __init__(self, coords: Coords, parent, rating: Optional[float] = None, cost: float = 0):
         self.parent = parent
         self.rating = rating
         self.coords = coords
+        self.cost = cost
 
 
-def __get_possible_moves(maze_: list, current_node: Node) -> list:
-    """Finds free cells (0 - valued) that surrounds current cell and returns list of possible moves."""
+def __get_possible_moves(passable: bytes, width: int, height: int, current_node: Node) -> list:
+    """Finds passable cells (0, 5 or terrain - valued) that surrounds current cell and returns list of possible moves.
+    :param passable: passability of maze cells flattened row by row (see grid.passable_cells).
+    """
     coords = current_node.coords
     neighbours = ((0, 1), (1, 0), (0, -1), (-1, 0))
     possible_moves = []
     for neighbour in neighbours:
         neighbour_coords = Coords(coords.width + neighbour[0], coords.height + neighbour[1])
-        if (0 <= neighbour_coords.width < len(maze_[coords.height]) and 0 <= neighbour_coords.height < len(maze_)
-                and (maze_[neighbour_coords.height][neighbour_coords.width] == 0
-                     or maze_[neighbour_coords.height][neighbour_coords.width] == 5)):
-            possible_moves.append(Node(neighbour_coords, current_node))
+        if (0 <= neighbour_coords.width < width and 0 <= neighbour_coords.height < height
+                and passable[neighbour_coords.height * width + neighbour_coords.width]):
+            possible_moves.append(Node(neighbour_coords, current_node, cost=current_node.cost + 1))
     return possible_moves
 
 
-def __get_pos_by_value(maze: list, value: int) -> Optional[Coords]:
+def __make_moves_function(costs: Optional[bytes], diagonal: bool) -> Callable[[bytes, int, int, Node], list]:
+    """Returns neighbour generation function like __get_possible_moves for weighted terrain and / or
+    8-connected moves. Moving into the cell costs its value in costs (1 without costs), diagonal moves
+    cost sqrt(2) times more and can't cut corners of walls.
+    :param costs: cost of moving into every cell flattened row by row (see grid.cell_costs) or None for unit costs.
+    """
+    directions = ((0, 1), (1, 0), (0, -1), (-1, 0))
+    if diagonal:
+        directions += ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+    def get_moves(passable: bytes, width: int, height: int, current_node: Node) -> list:
+        x, y = current_node.coords
+        possible_moves = []
+        for dx, dy in directions:
+            neighbour_x, neighbour_y = x + dx, y + dy
+            if not (0 <= neighbour_x < width and 0 <= neighbour_y < height):
+                continue
+            index = neighbour_y * width + neighbour_x
+            if not passable[index]:
+                continue
+            step = costs[index] if costs is not None else 1
+            if dx and dy:
+                if not (passable[y * width + neighbour_x] and passable[neighbour_y * width + x]):
+                    continue
+                step *= DIAGONAL_COST
+            possible_moves.append(Node(Coords(neighbour_x, neighbour_y), current_node, cost=current_node.cost + step))
+        return possible_moves
+
+    return get_moves
+
+
+def __get_pos_by_value(maze: Grid, value: int) -> Optional[Coords]:
     """Returns 1st occurrence Coord in maze by value or None if not found."""
-    for y, line in enumerate(maze):
-        for x, char in enumerate(line):
-            if char == value:
-                return Coords(x, y)
-    return None
+    position = find_value(maze, value)
+    return Coords(*position) if position else None
 
 
 def __calculate_greedy_bfs_rating(current: Node, finish: Node) -> int:
@@ -44,64 +93,546 @@ def __calculate_greedy_bfs_rating(current: Node, finish: Node) -> int:
     return dx + dy
 
 
-def __calculate_a_star_rating(current: Node, finish: Node) -> int:
-    """Calculates rating for given position for greedy BFS search. Counts both
-    manhattan distance to finish and walked path."""
-    rating = __calculate_greedy_bfs_rating(current, finish)
-    moved_path = 1
-    parent_node = current
-    while parent_node is not None:
-        moved_path += 1
-        parent_node = parent_node.parent
-    return rating + moved_path
+def __calculate_octile_distance(current: Node, finish: Node) -> float:
+    """Calculates the shortest distance to finish with 8-connected moves on free cells."""
+    dx = abs(finish.coords.width - current.coords.width)
+    dy = abs(finish.coords.height - current.coords.height)
+    return max(dx, dy) + (DIAGONAL_COST - 1) * min(dx, dy)
+
+
+def __calculate_euclidean_distance(current: Node, finish: Node) -> float:
+    """Calculates straight line distance to finish."""
+    return hypot(finish.coords.width - current.coords.width, finish.coords.height - current.coords.height)
+
+
+def __calculate_a_star_rating(current: Node, finish: Node, distance=__calculate_greedy_bfs_rating) -> float:
+    """Calculates rating for given position for A* search. Counts both
+    heuristic distance to finish (manhattan by default) and walked path cost stored in the node."""
+    return distance(current, finish) + current.cost
+
+
+def __calculate_dijkstra_rating(current: Node, finish: Node) -> float:
+    """Calculates rating for given position for Dijkstra search: walked path cost stored in the node."""
+    return current.cost
+
+
+def __get_distance_function(heuristic: Optional[str], diagonal: bool) -> Callable[[Node, Node], float]:
+    """Returns heuristic distance function by Heuristics value. Manhattan distance is the default
+    for 4-connected moves, octile for 8-connected ones (manhattan distance overestimates diagonal paths)."""
+    if heuristic is None:
+        heuristic = Heuristics.OCTILE.value if diagonal else Heuristics.MANHATTAN.value
+    distances = {Heuristics.MANHATTAN.value: __calculate_greedy_bfs_rating,
+                 Heuristics.OCTILE.value: __calculate_octile_distance,
+                 Heuristics.EUCLIDEAN.value: __calculate_euclidean_distance}
+    if heuristic not in distances:
+        raise ValueError(f'Unknown heuristic: {heuristic}')
+    return distances[heuristic]
+
+
+class _QueueFrontier:
+    """FIFO frontier used by BFS."""
+
+    def __init__(self):
+        self.__nodes = deque()
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+    def push(self, node: Node) -> None:
+        self.__nodes.append(node)
+
+    def pop(self) -> Node:
+        return self.__nodes.popleft()
+
+
+class _StackFrontier:
+    """LIFO frontier used by DFS."""
+
+    def __init__(self):
+        self.__nodes = []
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+    def push(self, node: Node) -> None:
+        self.__nodes.append(node)
+
+    def pop(self) -> Node:
+        return self.__nodes.pop()
+
+
+class _PriorityFrontier:
+    """Binary heap frontier used by Greedy BFS and A*. Nodes with equal rating are popped in insertion order.
+    Entries are never removed from the middle of the heap: superseded entries stay in place and the search
+    skips them when they are popped (lazy deletion)."""
+
+    def __init__(self):
+        self.__heap = []
+        self.__counter = count()
+
+    def __len__(self) -> int:
+        return len(self.__heap)
+
+    def push(self, node: Node) -> None:
+        heapq.heappush(self.__heap, (node.rating, next(self.__counter), node))
+
+    def pop(self) -> Node:
+        return heapq.heappop(self.__heap)[-1]
+
+    def top_rating(self) -> int:
+        """Returns the smallest rating in the frontier without removing the node."""
+        return self.__heap[0][0]
+
+
+class _OpenedCell:
+    """Passability view that makes one more cell passable. Used for lazy passability of grid backends,
+    which can't be copied."""
+    __slots__ = ('passable', 'index')
+
+    def __init__(self, passable, index: int):
+        self.passable = passable
+        self.index = index
+
+    def __getitem__(self, index: int) -> int:
+        return 1 if index == self.index else self.passable[index]
+
+
+def __make_frontier(selected_mode: str):
+    """Returns empty frontier structure for selected search mode."""
+    if selected_mode == 'BFS':
+        return _QueueFrontier()
+    if selected_mode == 'DFS':
+        return _StackFrontier()
+    if selected_mode in ['Greedy BFS', 'A*', 'Dijkstra']:
+        return _PriorityFrontier()
+    raise ValueError(f'Unknown search mode: {selected_mode}')
+
+
+def nodes_from_cells(cells: List[Coords]) -> List[Node]:
+    """Converts cells between the start and the destination (ordered from the start) into find_path path format:
+    parent-linked Nodes with walked path cost, starting from the destination side."""
+    path, parent = [], None
+    for cost, coords in enumerate(cells, start=1):
+        parent = Node(coords, parent, cost=cost)
+        path.append(parent)
+    return path[::-1]
 
 
-def find_path(maze: List[List[int]], selected_mode: str) -> (List[Node], List[Node]):
+def __build_path(forward_node: Node, backward_node: Node) -> List[Node]:
+    """Joins two search trees that met in the same cell into find_path path format.
+    :param forward_node: meeting node of the tree grown from the start.
+    :param backward_node: meeting node of the tree grown from the destination.
+    """
+    cells = []
+    node = forward_node
+    while node is not None:
+        cells.append(node.coords)
+        node = node.parent
+    cells.reverse()
+    node = backward_node.parent
+    while node is not None:
+        cells.append(node.coords)
+        node = node.parent
+    return nodes_from_cells(cells[1:-1])  # start and destination are not the part of the path
+
+
+def __iter_bidirectional_bfs(passable: bytearray, width: int, height: int, start: Coords, destination: Coords,
+                             stats: Optional[SearchStats] = None) -> Generator[Node, None, List[Node]]:
+    """Bidirectional BFS. Frontiers grow from the start and from the destination by whole levels, the smaller one
+    goes first. The search stops after the level where the frontiers met, the shortest connection is returned."""
+    trees = ({start: Node(start, None)}, {destination: Node(destination, None)})  # reached cells of each side
+    frontiers = (_QueueFrontier(), _QueueFrontier())
+    get_moves = __get_possible_moves
+    if stats is not None:
+        frontiers = tuple(stats.wrap_frontier(frontier) for frontier in frontiers)
+        get_moves = stats.wrap_moves(get_moves)
+    for side, root in enumerate((start, destination)):
+        frontiers[side].push(trees[side][root])
+    meeting = None
+    while all(frontiers) and meeting is None:
+        if stats is not None:
+            stats.max_frontier = max(stats.max_frontier, len(frontiers[0]) + len(frontiers[1]))
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        tree, other_tree, frontier = trees[side], trees[1 - side], frontiers[side]
+        for _ in range(len(frontier)):
+            node = frontier.pop()
+            if node.parent is not None:
+                yield node
+            for possible_move in get_moves(passable, width, height, node):
+                other_node = other_tree.get(possible_move.coords)
+                if other_node is not None and (meeting is None or possible_move.cost + other_node.cost
+                                               < meeting[0].cost + meeting[1].cost):
+                    meeting = (possible_move, other_node) if side == 0 else (other_node, possible_move)
+                if possible_move.coords not in tree:
+                    tree[possible_move.coords] = possible_move
+                    frontier.push(possible_move)
+                elif stats is not None:
+                    stats.on_duplicate(possible_move)
+    return __build_path(*meeting) if meeting else []
+
+
+def __iter_bidirectional_a_star(passable: bytearray, width: int, height: int, start: Coords, destination: Coords,
+                                stats: Optional[SearchStats] = None) -> Generator[Node, None, List[Node]]:
+    """Bidirectional A*. Each side rates nodes by walked path and manhattan distance to the opposite end,
+    the side with smaller frontier is expanded next. The search stops when the rating of one of the frontiers
+    reaches the length of the best connection found so far, which is the shortest path then."""
+    ends = (destination, start)  # targets of the forward and backward searches
+    trees = ({start: Node(start, None)}, {destination: Node(destination, None)})  # the cheapest node of each cell
+    frontiers = (_PriorityFrontier(), _PriorityFrontier())
+    get_moves = __get_possible_moves
+    if stats is not None:
+        frontiers = tuple(stats.wrap_frontier(frontier) for frontier in frontiers)
+        get_moves = stats.wrap_moves(get_moves)
+    for side, root in enumerate((start, destination)):
+        trees[side][root].rating = 0
+        frontiers[side].push(trees[side][root])
+    meeting, best_length = None, None
+    while all(frontiers):
+        if best_length is not None and max(frontier.top_rating() for frontier in frontiers) >= best_length:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        tree, other_tree, frontier = trees[side], trees[1 - side], frontiers[side]
+        node = frontier.pop()
+        if node is not tree[node.coords]:  # skip entries superseded by a cheaper path
+            continue
+        if node.parent is not None:
+            yield node
+        for possible_move in get_moves(passable, width, height, node):
+            known_node = tree.get(possible_move.coords)
+            if known_node is not None and known_node.cost <= possible_move.cost:
+                if stats is not None:
+                    stats.on_duplicate(possible_move)
+                continue
+            tree[possible_move.coords] = possible_move
+            possible_move.rating = possible_move.cost + abs(ends[side].width - possible_move.coords.width) \
+                + abs(ends[side].height - possible_move.coords.height)
+            frontier.push(possible_move)
+            other_node = other_tree.get(possible_move.coords)
+            if other_node is not None and (best_length is None or possible_move.cost + other_node.cost < best_length):
+                best_length = possible_move.cost + other_node.cost
+                meeting = (possible_move, other_node) if side == 0 else (other_node, possible_move)
+    return __build_path(*meeting) if meeting else []
+
+
+def __jump(passable: bytes, width: int, height: int, x: int, y: int, dx: int, dy: int,
+           destination: Coords) -> Optional[Coords]:
+    """Moves from (x, y) in (dx, dy) direction while cells are free and returns the next jump point:
+    the destination, a cell with forced neighbour or, for vertical moves, a cell with a jump point
+    to the side of it. Returns None if the move runs into a wall."""
+
+    def is_free(x_: int, y_: int) -> bool:
+        return 0 <= x_ < width and 0 <= y_ < height and passable[y_ * width + x_] == 1
+
+    while is_free(x, y):
+        if (x, y) == destination:
+            return Coords(x, y)
+        if dx:
+            if (is_free(x, y - 1) and not is_free(x - dx, y - 1)) or (is_free(x, y + 1) and not is_free(x - dx, y + 1)):
+                return Coords(x, y)
+        else:
+            if (is_free(x - 1, y) and not is_free(x - 1, y - dy)) or (is_free(x + 1, y) and not is_free(x + 1, y - dy)):
+                return Coords(x, y)
+            # vertical moves stop where a horizontal jump would find something
+            if (__jump(passable, width, height, x + 1, y, 1, 0, destination)
+                    or __jump(passable, width, height, x - 1, y, -1, 0, destination)):
+                return Coords(x, y)
+        x, y = x + dx, y + dy
+    return None
+
+
+def __iter_jps(passable: bytes, width: int, height: int, start: Coords, destination: Coords,
+               stats: Optional[SearchStats] = None) -> Generator[Node, None, List[Node]]:
+    """Jump Point Search for 4-connected grids with uniform costs. A* that expands only jump points: straight moves
+    skip cells that have no forced neighbours, so symmetric paths through open areas are not explored.
+    Inspected cells are expanded jump points, found path is filled with all cells between them."""
+    frontier = _PriorityFrontier()
+    jump = __jump
+    if stats is not None:
+        frontier = stats.wrap_frontier(frontier)
+        jump = stats.wrap_jump(jump)
+    start_node = Node(start, None, rating=0)
+    best_costs = {start: 0}
+    frontier.push(start_node)
+    while frontier:
+        node = frontier.pop()
+        if node.cost != best_costs[node.coords]:  # skip entries superseded by a cheaper path
+            continue
+        if node.coords == destination:
+            cells = []  # cells from the destination back to the start
+            while node.parent is not None:
+                parent = node.parent.coords
+                dx = (node.coords.width > parent.width) - (node.coords.width < parent.width)
+                dy = (node.coords.height > parent.height) - (node.coords.height < parent.height)
+                cell = node.coords
+                while cell != parent:
+                    cells.append(cell)
+                    cell = Coords(cell.width - dx, cell.height - dy)
+                node = node.parent
+            return nodes_from_cells(cells[:0:-1])  # the destination is not the part of the path
+        if node.parent is not None:
+            yield node
+            parent = node.parent.coords
+            dx = (node.coords.width > parent.width) - (node.coords.width < parent.width)
+            dy = (node.coords.height > parent.height) - (node.coords.height < parent.height)
+            directions = ((dx, 0), (0, 1), (0, -1)) if dx else ((0, dy), (1, 0), (-1, 0))  # pruned neighbours
+        else:
+            directions = ((0, 1), (1, 0), (0, -1), (-1, 0))
+        for dx, dy in directions:
+            jump_point = jump(passable, width, height, node.coords.width + dx, node.coords.height + dy, dx, dy,
+                              destination)
+            if jump_point is None:
+                continue
+            cost = node.cost + abs(jump_point.width - node.coords.width) + abs(jump_point.height - node.coords.height)
+            if best_costs.get(jump_point, cost + 1) <= cost:
+                if stats is not None:
+                    stats.on_duplicate(jump_point)
+                continue
+            best_costs[jump_point] = cost
+            rating = cost + abs(destination.width - jump_point.width) + abs(destination.height - jump_point.height)
+            frontier.push(Node(jump_point, node, rating, cost))
+    return []
+
+
+def find_path(maze: Grid, selected_mode: str, start: Optional[Coords] = None,
+              destination: Optional[Coords] = None, components=None, stats: Optional[SearchStats] = None,
+              diagonal: bool = False, weighted: bool = False,
+              heuristic: Optional[str] = None) -> (List[Node], List[Node]):
     """
     Finds path from start to finish. Returns list of moves and found path. Different search algorythm can be used by
     setting up selected mode argument.
-    :param maze: maze grid of integers.
-                (0 - free space, 1 - wall, 2 - explored cells, 3 - found path, 4 - start, 5 - destination)
+    :param maze: maze grid of integers, nested list, uint8 NumPy array or grid backend (tiled_grid.TiledGrid).
+                (0 - free space, 1 - wall, 2 - explored cells, 3 - found path, 4 - start, 5 - destination,
+                 6 - sand, 7 - mud, 8 - water: passable terrain, see Settings.TERRAIN_COSTS)
     :param selected_mode: Selects search algorythm:
                 ('BFS' - uninformed. finds optimal solution,
                  'DFS' - uninformed,
                  'Greedy BFS' - informed. Heuristics rating based on the destination to target,
                  'A*' - informed. Heuristics rating based on the destination to target and walked path,
-                        finds optimal solution.)
+                        finds optimal solution,
+                 'Bidirectional BFS' - uninformed. Searches from both ends, finds optimal solution,
+                 'Bidirectional A*' - informed. Searches from both ends, finds optimal solution.
+                        Inspected cells of both searches are interleaved in the list of moves,
+                 'Jump Point Search' - informed. A* that inspects only jump points, finds optimal solution,
+                 'Dijkstra' - uninformed. Expands cells by walked path cost, finds optimal solution.)
+                Bidirectional searches and Jump Point Search raise ValueError for weighted terrain or diagonal moves,
+                BFS and DFS for weighted terrain.
+    :param start: (x, y) coordinates of the start or None to use cell with value 4.
+    :param destination: (x, y) coordinates of the destination or None to use cell with value 5.
+                The destination cell must be passable (0, 5 or terrain - valued).
+    :param components: connected components of the maze (components.ComponentIndex) checked before the search,
+                so a walled off destination is reported without inspecting cells.
+    :param stats: SearchStats object to fill with counters and timers of the search (expanded, generated and
+                duplicate nodes, frontier operations, phase times), None runs the search without instrumentation.
+    :param diagonal: allow 8-connected moves, diagonal moves cost sqrt(2) and can't cut corners of walls.
+    :param weighted: moving into terrain cells costs Settings.TERRAIN_COSTS, other cells cost 1.
+                Terrain is passable with unit cost otherwise.
+    :param heuristic: Heuristics value for Greedy BFS and A*: 'manhattan' (default for 4-connected moves),
+                'octile' (default for diagonal moves) or 'euclidean'.
     :return: List of inspected cells before the path is found, list of cells for found path or [].
     """
-    stack, path, moves = [], [], []
-    start_node = Node(__get_pos_by_value(maze, 4), None)  # find start coords in maze (cell value = 4)
-    destination_node = Node(__get_pos_by_value(maze, 5), None)  # find finish coords in maze (cell value = 5)
+    width, height = grid_size(maze)
+    start = Coords(*start) if start is not None else __get_pos_by_value(maze, 4)  # start cell value = 4
+    destination = Coords(*destination) if destination is not None else __get_pos_by_value(maze, 5)
+    __check_movement(selected_mode, weighted, diagonal)
+    if components is not None and start and destination and not components.connected(start, destination):
+        return [], []
+    return find_path_in_cells(passable_cells(maze), width, height, start, destination, selected_mode, stats,
+                              cell_costs(maze) if weighted else None, diagonal, heuristic)
+
+
+def iter_find_path(maze: Grid, selected_mode: str, start: Optional[Coords] = None,
+                   destination: Optional[Coords] = None, max_expansions: Optional[int] = None,
+                   cancel: Optional[threading.Event] = None, components=None,
+                   stats: Optional[SearchStats] = None, diagonal: bool = False, weighted: bool = False,
+                   heuristic: Optional[str] = None) -> Iterator[SearchEvent]:
+    """
+    Streaming variant of find_path: yields SearchEvent for every inspected cell as the search goes
+    and finally the found path, see iter_find_path_in_cells. Arguments are the same as in find_path.
+    :param max_expansions: max number of inspected cells, None for no limit (see iter_find_path_in_cells).
+    :param cancel: stop the search when this event is set (the consumer may also just close the generator).
+    """
+    width, height = grid_size(maze)
+    start = Coords(*start) if start is not None else __get_pos_by_value(maze, 4)  # start cell value = 4
+    destination = Coords(*destination) if destination is not None else __get_pos_by_value(maze, 5)
+    __check_movement(selected_mode, weighted, diagonal)
+    if components is not None and start and destination and not components.connected(start, destination):
+        yield SearchEvent(SearchEventKinds.PATH, [])
+        return
+    yield from iter_find_path_in_cells(passable_cells(maze), width, height, start, destination, selected_mode,
+                                       max_expansions, cancel, stats, cell_costs(maze) if weighted else None,
+                                       diagonal, heuristic)
+
+
+def __iter_frontier_search(passable: bytes, width: int, height: int, start: Coords, destination: Coords,
+                           selected_mode: str, stats: Optional[SearchStats] = None, costs: Optional[bytes] = None,
+                           diagonal: bool = False,
+                           heuristic: Optional[str] = None) -> Generator[Node, None, List[Node]]:
+    """BFS, DFS, Greedy BFS, A* and Dijkstra that differ by frontier structure and rating of nodes.
+    With unit 4-connected moves the search stops when the destination is generated. A* and Dijkstra over weighted
+    terrain or diagonal moves stop when the destination is popped from the frontier, so the found path is
+    the cheapest one."""
+    frontier = __make_frontier(selected_mode)
+    unit_moves = costs is None and not diagonal
+    get_moves = __get_possible_moves if unit_moves else __make_moves_function(costs, diagonal)
+    rate = None
+    if selected_mode in ['Greedy BFS', 'A*']:
+        distance = __get_distance_function(heuristic, diagonal)
+        if selected_mode == 'Greedy BFS':
+            rate = distance
+        elif distance is __calculate_greedy_bfs_rating:
+            rate = __calculate_a_star_rating
+        else:
+            rate = partial(__calculate_a_star_rating, distance=distance)
+    elif selected_mode == 'Dijkstra':
+        rate = __calculate_dijkstra_rating
+    if stats is not None:
+        frontier = stats.wrap_frontier(frontier)
+        get_moves = stats.wrap_moves(get_moves)
+        rate = stats.wrap_rating(rate) if rate is not None else None
+    stop_on_pop = not unit_moves and selected_mode in ['A*', 'Dijkstra']
+    path = []
+    start_node = Node(start, None)
+    destination_node = Node(destination, None)
+    best_costs = {start_node.coords: 0}  # the lowest walked path cost of every node put to the frontier
     node = start_node
     while True:
-        possible_moves = __get_possible_moves(maze, node)
-        if destination_node.coords in (possible_move.coords for possible_move in possible_moves):
+        possible_moves = get_moves(passable, width, height, node)
+        if not stop_on_pop and any(possible_move.coords == destination_node.coords
+                                   for possible_move in possible_moves):
             while node.coords != start_node.coords:
                 path.append(node)
                 node = node.parent
-            return moves, path
-        possible_moves = list(filter(lambda x: x.coords not in (m.coords for m in stack + moves), possible_moves))
-        if selected_mode in ['Greedy BFS', 'A*']:
-            for possible_move in possible_moves:
-                possible_move.rating = __calculate_greedy_bfs_rating(possible_move, destination_node) \
-                    if selected_mode == 'Greedy BFS' else __calculate_a_star_rating(possible_move, destination_node)
-        stack.extend(possible_moves)
-        if not stack:
-            return moves, []
-        if selected_mode == 'BFS':
-            node = stack.pop(0)
-        elif selected_mode == 'DFS':
-            node = stack.pop(-1)
-        elif selected_mode in ['Greedy BFS', 'A*']:
-            stack.sort(key=lambda x: x.rating)
-            node = stack.pop(0)
-        moves.append(node)
+            return path
+        for possible_move in possible_moves:
+            best_cost = best_costs.get(possible_move.coords)
+            # A* and Dijkstra re-queue a node reached by a cheaper path, the outdated heap entry is skipped when popped
+            if best_cost is not None and (selected_mode not in ['A*', 'Dijkstra'] or best_cost <= possible_move.cost):
+                if stats is not None:
+                    stats.on_duplicate(possible_move)
+                continue
+            best_costs[possible_move.coords] = possible_move.cost
+            if rate is not None:
+                possible_move.rating = rate(possible_move, destination_node)
+            frontier.push(possible_move)
+        while frontier:
+            node = frontier.pop()
+            if node.cost == best_costs[node.coords]:  # skip entries superseded by a cheaper path
+                break
+        else:
+            return []
+        if node.coords == destination_node.coords:
+            node = node.parent
+            while node.coords != start_node.coords:
+                path.append(node)
+                node = node.parent
+            return path
+        yield node
 
 
-def find_path_select_mode(maze_: list) -> list:
-    """Search mode selector for path finding function. Adds search mode selected by user to main function execution."""
-    search_modes = ('BFS', 'DFS', 'Greedy BFS', 'A*')
+def __check_movement(selected_mode: str, weighted: bool, diagonal: bool) -> None:
+    """Raises ValueError if the mode doesn't support weighted terrain or diagonal moves."""
+    if weighted and selected_mode not in WEIGHTED_MODES:
+        raise ValueError(f'{selected_mode} mode does not support weighted terrain')
+    if diagonal and selected_mode not in DIAGONAL_MODES:
+        raise ValueError(f'{selected_mode} mode does not support diagonal moves')
+
+
+def __iter_search(passable: bytes, width: int, height: int, start: Coords, destination: Coords,
+                  selected_mode: str, stats: Optional[SearchStats] = None, costs: Optional[bytes] = None,
+                  diagonal: bool = False, heuristic: Optional[str] = None) -> Generator[Node, None, List[Node]]:
+    """Returns search generator of selected mode. It yields inspected nodes and returns found path.
+    The search is instrumented if stats is given. Raises ValueError if the mode doesn't support
+    weighted terrain (costs) or diagonal moves."""
+    __check_movement(selected_mode, costs is not None, diagonal)
+    if selected_mode in ['Bidirectional BFS', 'Bidirectional A*']:
+        # the backward search has to step into the start
+        if isinstance(passable, (bytes, bytearray)):
+            passable = bytearray(passable)
+            passable[start.height * width + start.width] = 1
+        else:
+            passable = _OpenedCell(passable, start.height * width + start.width)
+        if selected_mode == 'Bidirectional BFS':
+            search = __iter_bidirectional_bfs(passable, width, height, start, destination, stats)
+        else:
+            search = __iter_bidirectional_a_star(passable, width, height, start, destination, stats)
+    elif selected_mode == 'Jump Point Search':
+        search = __iter_jps(passable, width, height, start, destination, stats)
+    else:
+        search = __iter_frontier_search(passable, width, height, start, destination, selected_mode, stats, costs,
+                                        diagonal, heuristic)
+    if stats is None:
+        return search
+    stats.mode = selected_mode
+    return stats.wrap_search(search)
+
+
+def iter_find_path_in_cells(passable: bytes, width: int, height: int, start: Coords, destination: Coords,
+                            selected_mode: str, max_expansions: Optional[int] = None,
+                            cancel: Optional[threading.Event] = None, stats: Optional[SearchStats] = None,
+                            costs: Optional[bytes] = None, diagonal: bool = False,
+                            heuristic: Optional[str] = None) -> Iterator[SearchEvent]:
+    """
+    Streaming search core that works on precomputed passability of the maze, so it can be reused
+    for many queries over the same maze. Inspected cells are not collected, so memory doesn't grow
+    with the number of yielded events.
+    :param passable: passability of maze cells flattened row by row (see grid.passable_cells).
+    :param max_expansions: max number of inspected cells, None for no limit. The search that finishes within
+                the budget yields PATH, the search that needs more cells yields STOPPED after max_expansions cells.
+    :param cancel: stop the search when this event is set (the consumer may also just close the generator).
+    :param stats: SearchStats object to fill with counters and timers of the search, None runs without
+                instrumentation.
+    :param costs: cost of moving into every cell flattened row by row (see grid.cell_costs), None for unit costs.
+    :param diagonal: allow 8-connected moves.
+    :param heuristic: Heuristics value for Greedy BFS and A*, None for manhattan (4-connected) or octile (diagonal).
+    :return: iterator over SearchEvent tuples: EXPLORED event with Node for every inspected cell, then
+             PATH event with the list of path cells in find_path format ([] if not found) or STOPPED event with [].
+    """
+    search = __iter_search(passable, width, height, start, destination, selected_mode, stats, costs, diagonal,
+                           heuristic)
+    expansions = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            yield SearchEvent(SearchEventKinds.STOPPED, [])
+            return
+        try:
+            node = next(search)
+        except StopIteration as finished:
+            yield SearchEvent(SearchEventKinds.PATH, finished.value)
+            return
+        if max_expansions is not None and expansions >= max_expansions:  # the search needs one more expansion
+            yield SearchEvent(SearchEventKinds.STOPPED, [])
+            return
+        yield SearchEvent(SearchEventKinds.EXPLORED, node)
+        expansions += 1
+
+
+def find_path_in_cells(passable: bytes, width: int, height: int, start: Coords, destination: Coords,
+                       selected_mode: str, stats: Optional[SearchStats] = None, costs: Optional[bytes] = None,
+                       diagonal: bool = False, heuristic: Optional[str] = None) -> (List[Node], List[Node]):
+    """
+    Search core of find_path that works on precomputed passability of the maze, so it can be reused
+    for many queries over the same maze. Arguments are the same as in iter_find_path_in_cells.
+    :param passable: passability of maze cells flattened row by row (see grid.passable_cells).
+    :return: List of inspected cells before the path is found, list of cells for found path or [].
+    """
+    moves, path = [], []
+    for event in iter_find_path_in_cells(passable, width, height, start, destination, selected_mode, stats=stats,
+                                         costs=costs, diagonal=diagonal, heuristic=heuristic):
+        if event.kind == SearchEventKinds.EXPLORED:
+            moves.append(event.value)
+        else:
+            path = event.value
+    return moves, path
+
+
+def select_search_mode() -> str:
+    """Asks user to select search mode in console and returns its name."""
+    search_modes = tuple(mode.value for mode in SearchAlgorithmModes)
     users_answer = int(input(f'Input path search mode: ' +
                              "".join((f"{pos + 1}. {mode}, " for pos, mode in enumerate(search_modes)))[:-2] + ': '))
-    return find_path(maze_, search_modes[users_answer - 1])
+    return search_modes[users_answer - 1]
+
+
+def find_path_select_mode(maze_: list) -> list:
+    """Search mode selector for path finding function. Adds search mode selected by user to main function execution."""
+    return find_path(maze_, select_search_mode())
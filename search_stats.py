@@ -0,0 +1,151 @@
+from time import perf_counter
+from typing import Callable, Dict, Generator, List, Optional
+
+PHASES = ('neighbours', 'heuristic', 'frontier')
+
+
+class _InstrumentedFrontier:
+    """Frontier wrapper that counts and times pushes and pops and tracks the largest frontier size."""
+
+    def __init__(self, frontier, stats: 'SearchStats'):
+        self.__frontier = frontier
+        self.__stats = stats
+
+    def __len__(self) -> int:
+        return len(self.__frontier)
+
+    def push(self, node) -> None:
+        stats = self.__stats
+        started = perf_counter()
+        self.__frontier.push(node)
+        stats.phase_times['frontier'] += perf_counter() - started
+        stats.pushes += 1
+        stats.max_frontier = max(stats.max_frontier, len(self.__frontier))
+        if stats.tracer is not None:
+            stats.tracer('push', node)
+
+    def pop(self):
+        stats = self.__stats
+        started = perf_counter()
+        node = self.__frontier.pop()
+        stats.phase_times['frontier'] += perf_counter() - started
+        stats.pops += 1
+        if stats.tracer is not None:
+            stats.tracer('pop', node)
+        return node
+
+    def top_rating(self) -> int:
+        return self.__frontier.top_rating()
+
+
+class SearchStats:
+    """Counters and timers of one search, filled when passed to search_path.find_path as stats argument.
+    Searches without stats object run not instrumented code, so instrumentation costs nothing when it is off.
+    Phase timers: neighbours - neighbour generation (jumps for Jump Point Search), heuristic - rating of nodes
+    (modes with separate rating step), frontier - frontier pushes and pops. The rest of total time is duplicate
+    filtering, path building and other bookkeeping. Timers have their own overhead: instrumented search
+    is slower than the plain one, compare phases with each other rather than with plain runs.
+    Optional tracer is called with event name ('expand', 'generate', 'duplicate', 'push', 'pop') and node."""
+
+    def __init__(self, mode: Optional[str] = None, tracer: Optional[Callable[[str, object], None]] = None):
+        self.mode = mode
+        self.tracer = tracer
+        self.expanded = 0
+        self.generated = 0  # neighbours (jump points) produced by expansions
+        self.duplicates = 0  # generated nodes rejected because their cell was already reached by a path as cheap
+        self.pushes = 0
+        self.pops = 0  # including outdated entries skipped by lazy deletion
+        self.max_frontier = 0
+        self.path_length = 0
+        self.cached = False  # result was served from Maze.path_cache, the search didn't run
+        self.total_time = 0.0  # seconds spent in the search, time of the events consumer is not included
+        self.phase_times: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    def wrap_search(self, search: Generator) -> Generator:
+        """Times steps of search generator and counts expanded nodes. Yields and returns the same values."""
+        while True:
+            started = perf_counter()
+            try:
+                node = next(search)
+            except StopIteration as finished:
+                self.total_time += perf_counter() - started
+                self.path_length = len(finished.value)
+                return finished.value
+            self.total_time += perf_counter() - started
+            self.expanded += 1
+            if self.tracer is not None:
+                self.tracer('expand', node)
+            yield node
+
+    def wrap_moves(self, get_moves: Callable[..., List]) -> Callable[..., List]:
+        """Times neighbour generation function and counts generated nodes."""
+
+        def timed_moves(*args):
+            started = perf_counter()
+            moves = get_moves(*args)
+            self.phase_times['neighbours'] += perf_counter() - started
+            self.generated += len(moves)
+            if self.tracer is not None:
+                for node in moves:
+                    self.tracer('generate', node)
+            return moves
+
+        return timed_moves
+
+    def wrap_jump(self, jump: Callable) -> Callable:
+        """Times Jump Point Search jump function and counts found jump points."""
+
+        def timed_jump(*args):
+            started = perf_counter()
+            jump_point = jump(*args)
+            self.phase_times['neighbours'] += perf_counter() - started
+            if jump_point is not None:
+                self.generated += 1
+                if self.tracer is not None:
+                    self.tracer('generate', jump_point)
+            return jump_point
+
+        return timed_jump
+
+    def wrap_rating(self, rate: Callable[..., int]) -> Callable[..., int]:
+        """Times rating function."""
+
+        def timed_rating(*args):
+            started = perf_counter()
+            rating = rate(*args)
+            self.phase_times['heuristic'] += perf_counter() - started
+            return rating
+
+        return timed_rating
+
+    def wrap_frontier(self, frontier) -> _InstrumentedFrontier:
+        return _InstrumentedFrontier(frontier, self)
+
+    def on_duplicate(self, node) -> None:
+        self.duplicates += 1
+        if self.tracer is not None:
+            self.tracer('duplicate', node)
+
+    def as_dict(self) -> dict:
+        """Returns stats as plain dictionary (JSON serializable)."""
+        return {'mode': self.mode, 'expanded': self.expanded, 'generated': self.generated,
+                'duplicates': self.duplicates, 'pushes': self.pushes, 'pops': self.pops,
+                'max_frontier': self.max_frontier, 'path_length': self.path_length, 'cached': self.cached,
+                'total_time': self.total_time, 'phase_times': dict(self.phase_times)}
+
+    def summary(self) -> str:
+        """Returns one line summary."""
+        if self.cached:
+            return f'Expanded: {self.expanded} (cached), path: {self.path_length}'
+        return f'Expanded: {self.expanded}, frontier: {self.max_frontier}, {self.total_time * 1000:.1f} ms'
+
+    def report(self) -> str:
+        """Returns multi-line report of counters and phase timers."""
+        lines = [f'Search: {self.mode}{" (cached)" if self.cached else ""}',
+                 f'Expanded: {self.expanded}, generated: {self.generated}, duplicates rejected: {self.duplicates}',
+                 f'Frontier pushes: {self.pushes}, pops: {self.pops}, max size: {self.max_frontier}',
+                 f'Path: {self.path_length} cells, search time: {self.total_time * 1000:.2f} ms']
+        phases_time = sum(self.phase_times.values())
+        lines.append(', '.join(f'{phase}: {seconds * 1000:.2f} ms' for phase, seconds in self.phase_times.items())
+                     + f', other: {max(self.total_time - phases_time, 0) * 1000:.2f} ms')
+        return '\n'.join(lines)
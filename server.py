@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config import GridSymbols, SearchAlgorithmModes
+from grid import cell_costs, find_value, free_cells, np
+from maze import Maze
+from maze_format import load_any
+from search_path import Coords, find_path_in_cells
+
+# JSON-lines protocol: one request object per line, one response object per line.
+# Requests may carry "id" which is copied to the response, responses of one connection may come out of order.
+#   {"op": "load", "maze": "m1", "file": "maze.txt"} -> {"ok": true, "maze": "m1", "width": 40, "height": 40}
+#   {"op": "solve", "maze": "m1", "mode": "A*", "start": [x, y], "destination": [x, y],
+#    "diagonal": false, "weighted": false, "heuristic": null}
+#       -> {"ok": true, "explored": 120, "path": [[x, y], ...]}  (start and destination default to the maze file
+#          ones, path is in find_path order: from the destination side to the start, both ends excluded)
+#   {"op": "unload", "maze": "m1"} -> {"ok": true}
+#   {"op": "list"} -> {"ok": true, "mazes": {"m1": {"file": "maze.txt", "width": 40, "height": 40}}}
+# Errors are reported as {"ok": false, "error": "message"}.
+
+# Worker state: mazes solved by this worker (thread or process), read from shared memory on the first query
+_worker_mazes: Dict[int, tuple] = {}  # load token -> (passability, cell costs, width, height)
+
+
+def _solve(token: int, shared_name: str, width: int, height: int, live_tokens: FrozenSet[int], mode: str,
+           start: Tuple[int, int], destination: Tuple[int, int], diagonal: bool, weighted: bool,
+           heuristic: Optional[str]) -> Tuple[int, List[Tuple[int, int]]]:
+    """Solves single query in the worker. The maze layers are read from shared memory once per worker and
+    load token, so workers keep mazes resident between queries. Mazes of tokens that are not live any more
+    (unloaded or reloaded) are dropped. Returns number of explored cells and path coordinates."""
+    for stale_token in _worker_mazes.keys() - live_tokens:
+        _worker_mazes.pop(stale_token, None)
+    cached = _worker_mazes.get(token)
+    if cached is None:
+        cells_count = width * height
+        shared = SharedMemory(name=shared_name)
+        try:
+            cached = (bytes(shared.buf[:cells_count]), bytes(shared.buf[cells_count:2 * cells_count]), width, height)
+        finally:
+            shared.close()
+        _worker_mazes[token] = cached
+    passable, costs, width, height = cached
+    moves, path = find_path_in_cells(passable, width, height, Coords(*start), Coords(*destination), mode,
+                                     costs=costs if weighted else None, diagonal=diagonal, heuristic=heuristic)
+    return len(moves), [tuple(node.coords) for node in path]
+
+
+class _ResidentMaze:
+    """Maze kept by the server: its file, size, default ends and connected components for instant
+    unreachable answers. The maze is loaded once: its passability and cell costs are put to shared memory
+    for the workers. Only walls block the search, painted start and destination cells are passable
+    like in batch.solve_batch, so an explicit start or destination may be anywhere out of walls."""
+
+    def __init__(self, file_name: str, token: int):
+        self.file_name = file_name
+        self.token = token
+        self.maze = Maze.from_grid(load_any(file_name, use_numpy=np is not None))
+        self.maze.components.build()
+        self.start = find_value(self.maze.grid, GridSymbols.START.value)
+        self.destination = find_value(self.maze.grid, GridSymbols.DESTINATION.value)
+        cells_count = self.maze.width * self.maze.height
+        self.shared = SharedMemory(create=True, size=max(2 * cells_count, 1))
+        self.shared.buf[:cells_count] = free_cells(self.maze.grid)
+        self.shared.buf[cells_count:2 * cells_count] = cell_costs(self.maze.grid)
+        self.pending = 0  # solves waiting for the workers
+        self.unloaded = False
+
+    def release(self) -> None:
+        """Frees shared memory of the unloaded maze when its last pending solve is finished."""
+        self.unloaded = True
+        if not self.pending:
+            self.shared.close()
+            self.shared.unlink()
+
+    def info(self) -> dict:
+        return {'file': self.file_name, 'width': self.maze.width, 'height': self.maze.height}
+
+
+class MazeServer:
+    """Headless solve service. Mazes are loaded once and kept by id, solves run in the executor
+    (process pool by default), so clients don't pay interpreter and import start up for every query."""
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self.mazes: Dict[str, _ResidentMaze] = {}
+        self.__tokens = 0
+
+    async def load(self, maze_id: str, file_name: str) -> dict:
+        if not os.path.exists(file_name):
+            raise ValueError(f'file not found: {file_name}')
+        self.__tokens += 1
+        loop = asyncio.get_running_loop()
+        resident = await loop.run_in_executor(None, _ResidentMaze, file_name, self.__tokens)
+        if maze_id in self.mazes:
+            self.mazes[maze_id].release()
+        self.mazes[maze_id] = resident
+        return {'maze': maze_id, 'width': resident.maze.width, 'height': resident.maze.height}
+
+    def __get_maze(self, maze_id: str) -> _ResidentMaze:
+        if maze_id not in self.mazes:
+            raise ValueError(f'unknown maze: {maze_id}')
+        return self.mazes[maze_id]
+
+    async def solve(self, maze_id: str, mode: str, start: Optional[List[int]] = None,
+                    destination: Optional[List[int]] = None, diagonal: bool = False, weighted: bool = False,
+                    heuristic: Optional[str] = None) -> dict:
+        resident = self.__get_maze(maze_id)
+        if mode not in [search_mode.value for search_mode in SearchAlgorithmModes]:
+            raise ValueError(f'unknown search mode: {mode}')
+        start = tuple(start) if start is not None else resident.start
+        destination = tuple(destination) if destination is not None else resident.destination
+        if start is None or destination is None:
+            raise ValueError('start and destination are required, the maze has no default ones')
+        for x, y in (start, destination):
+            if not (0 <= x < resident.maze.width and 0 <= y < resident.maze.height):
+                raise ValueError(f'cell {[x, y]} is out of the maze')
+        if not resident.maze.components.connected(start, destination):
+            return {'explored': 0, 'path': []}
+        loop = asyncio.get_running_loop()
+        live_tokens = frozenset(live.token for live in self.mazes.values())
+        resident.pending += 1
+        try:
+            explored, path = await loop.run_in_executor(self.executor, partial(
+                _solve, resident.token, resident.shared.name, resident.maze.width, resident.maze.height,
+                live_tokens, mode, start, destination, diagonal, weighted, heuristic))
+        finally:
+            resident.pending -= 1
+            if resident.unloaded:
+                resident.release()
+        return {'explored': explored, 'path': [list(cell) for cell in path]}
+
+    async def handle_request(self, request: dict) -> dict:
+        """Runs request operation, returns response without id."""
+        operation = request.get('op')
+        if operation == 'load':
+            return await self.load(request['maze'], request['file'])
+        if operation == 'solve':
+            return await self.solve(request['maze'], request['mode'], request.get('start'),
+                                    request.get('destination'), bool(request.get('diagonal', False)),
+                                    bool(request.get('weighted', False)), request.get('heuristic'))
+        if operation == 'unload':
+            self.__get_maze(request['maze'])
+            self.mazes.pop(request['maze']).release()
+            return {}
+        if operation == 'list':
+            return {'mazes': {maze_id: resident.info() for maze_id, resident in self.mazes.items()}}
+        raise ValueError(f'unknown operation: {operation}')
+
+    def close(self) -> None:
+        """Unloads all mazes."""
+        while self.mazes:
+            self.mazes.popitem()[1].release()
+
+    async def __respond(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock) -> None:
+        response = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be JSON object')
+            if 'id' in request:
+                response['id'] = request['id']
+            response.update(await self.handle_request(request), ok=True)
+        except KeyError as error:
+            response.update(ok=False, error=f'missing field: {error.args[0]}')
+        except (ValueError, TypeError) as error:  # also json.JSONDecodeError and errors of the search
+            response.update(ok=False, error=str(error))
+        except Exception as error:  # unreadable file, crashed worker: the client still gets the answer
+            response.update(ok=False, error=f'{type(error).__name__}: {error}')
+        async with lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reads request lines of the connection and answers them concurrently."""
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.__respond(line, writer, lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(server: MazeServer, host: str = '127.0.0.1', port: int = 8765,
+                unix_socket: Optional[str] = None) -> None:
+    """Serves the protocol on TCP host:port or on Unix socket if unix_socket path is given until cancelled."""
+    if unix_socket:
+        listener = await asyncio.start_unix_server(server.handle_connection, unix_socket)
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port)
+    address = unix_socket or f'{host}:{port}'
+    print(f'Maze solve server is listening on {address}')
+    async with listener:
+        await listener.serve_forever()
+
+
+def parse_arguments(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Headless maze solve server (JSON lines over TCP or Unix socket).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on Unix socket path instead of TCP')
+    parser.add_argument('--workers', type=int, help='number of solve workers, defaults to the number of processors')
+    parser.add_argument('--threads', action='store_true', help='solve in threads instead of processes')
+    parser.add_argument('--maze', action='append', default=[], metavar='ID=FILE', help='maze to load on start')
+    return parser.parse_args(arguments)
+
+
+async def main(arguments: Optional[List[str]] = None) -> None:
+    args = parse_arguments(arguments)
+    executor = ThreadPoolExecutor(args.workers) if args.threads else ProcessPoolExecutor(args.workers)
+    server = MazeServer(executor)
+    with executor:
+        try:
+            for maze in args.maze:
+                maze_id, _, file_name = maze.partition('=')
+                await server.load(maze_id, file_name)
+            await serve(server, args.host, args.port, args.unix)
+        finally:
+            server.close()
+
+
+if __name__ == "__main__":
+    """Runs the solve server, see python server.py --help."""
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
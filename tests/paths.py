@@ -0,0 +1,16 @@
+from config import GridSymbols
+from grid import PASSABLE_VALUES
+
+
+def assert_walkable_path(grid, path) -> None:
+    """Checks that path in find_path format (cells between the start and the destination, from the destination
+    side) leads from the start of the grid to its destination by single steps over passable cells."""
+    destination = next((x, y) for y, row in enumerate(grid) for x, cell in enumerate(row)
+                       if cell == GridSymbols.DESTINATION.value)
+    start = next((x, y) for y, row in enumerate(grid) for x, cell in enumerate(row)
+                 if cell == GridSymbols.START.value)
+    cells = [destination] + [tuple(node.coords) for node in path] + [start]
+    for (x, y), (next_x, next_y) in zip(cells, cells[1:]):
+        assert abs(x - next_x) + abs(y - next_y) == 1, f'path jumps from {(x, y)} to {(next_x, next_y)}'
+    for x, y in cells[1:-1]:
+        assert grid[y][x] in PASSABLE_VALUES, f'path goes through blocked cell {(x, y)}'
@@ -0,0 +1,19 @@
+import os
+
+from batch import BatchSolver, Query, solve_batch_ordered
+from maze_format import load_text
+from search_path import find_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_batch_solver_answers_repeated_batches_like_find_path():
+    maze = load_text(os.path.join(ROOT, 'maze.txt'))
+    queries = [Query((5, 38), (29, 3), mode) for mode in ('BFS', 'DFS', 'A*')]
+    expected = [find_path(maze, query.algorithm) for query in queries]
+    with BatchSolver(maze, max_workers=2) as solver:
+        for _ in range(2):
+            results = solver.solve_ordered(queries)
+            assert [(result.explored, result.path) for result in results] == \
+                [(len(moves), [node.coords for node in path]) for moves, path in expected]
+    assert [result.index for result in solve_batch_ordered(maze, queries, max_workers=2)] == [0, 1, 2]
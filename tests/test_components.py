@@ -0,0 +1,76 @@
+import random
+
+from maze import Maze
+
+ROWS = ('00000000',
+        '01111110',
+        '01000010',
+        '01011010',
+        '00010000',
+        '11110111')
+
+
+def _flood_labels(maze: Maze) -> dict:
+    """Labels cells that are not walls by BFS flood fill."""
+    labels = {}
+    for y in range(maze.height):
+        for x in range(maze.width):
+            if maze.grid[y][x] == 1 or (x, y) in labels:
+                continue
+            labels[(x, y)] = (x, y)
+            queue = [(x, y)]
+            for cell_x, cell_y in queue:
+                for neighbour in ((cell_x - 1, cell_y), (cell_x + 1, cell_y), (cell_x, cell_y - 1),
+                                  (cell_x, cell_y + 1)):
+                    neighbour_x, neighbour_y = neighbour
+                    if (0 <= neighbour_x < maze.width and 0 <= neighbour_y < maze.height
+                            and maze.grid[neighbour_y][neighbour_x] != 1 and neighbour not in labels):
+                        labels[neighbour] = (x, y)
+                        queue.append(neighbour)
+    return labels
+
+
+def _assert_matches_flood(maze: Maze) -> None:
+    labels = _flood_labels(maze)
+    cells = list(labels)
+    for first in cells:
+        for second in cells:
+            assert maze.components.connected(first, second) == (labels[first] == labels[second]), (first, second)
+
+
+def _maze() -> Maze:
+    maze = Maze(len(ROWS[0]), len(ROWS))
+    for y, row in enumerate(ROWS):
+        for x, cell in enumerate(row):
+            if cell == '1':
+                maze.set_wall(x, y)
+    return maze
+
+
+def _toggle(maze: Maze, x: int, y: int) -> None:
+    if maze.grid[y][x] == 1:
+        maze.clear_cell(x, y)
+    else:
+        maze.set_wall(x, y)
+
+
+def test_components_follow_wall_edits():
+    maze = _maze()
+    _assert_matches_flood(maze)
+    # single edits: splitting walls, walls with free cells around them, joining removals
+    for x, y in ((0, 4), (2, 4), (4, 0), (7, 3), (4, 0), (1, 1), (6, 1), (2, 4), (5, 4)):
+        _toggle(maze, x, y)
+        _assert_matches_flood(maze)
+    # edits without queries in between: the split component is joined before it is labelled again
+    for x, y in ((4, 0), (0, 2), (4, 0)):
+        _toggle(maze, x, y)
+    _assert_matches_flood(maze)
+
+
+def test_components_follow_random_wall_edits():
+    randomizer = random.Random(17)
+    maze = _maze()
+    for _ in range(200):
+        for _ in range(randomizer.randint(1, 3)):
+            _toggle(maze, randomizer.randrange(maze.width), randomizer.randrange(maze.height))
+        _assert_matches_flood(maze)
@@ -0,0 +1,41 @@
+import os
+import shutil
+
+import pytest
+
+from hpa import HierarchicalPlanner, graph_file_name
+from maze import Maze
+from maze_format import load_text
+from paths import assert_walkable_path
+from search_path import find_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('cluster_size', (8, 32))
+@pytest.mark.parametrize('maze_file', ('maze.txt', 'maze2.txt', 'maze3.txt'))
+def test_planner_finds_path_exactly_when_bfs_does(maze_file: str, cluster_size: int):
+    maze = Maze.from_grid(load_text(os.path.join(ROOT, maze_file)))
+    path = HierarchicalPlanner(maze, cluster_size).find_path()[1]
+    assert bool(path) == bool(find_path(maze.grid, 'BFS')[1])
+    if path:
+        assert_walkable_path(maze.grid, path)
+
+
+def test_damaged_graph_file_is_rebuilt(tmp_path):
+    maze_file = str(tmp_path / 'maze.txt')
+    shutil.copy(os.path.join(ROOT, 'maze.txt'), maze_file)
+    maze = Maze.from_grid(load_text(maze_file))
+    expected = HierarchicalPlanner.open(maze, maze_file, 8).find_path()
+    with open(graph_file_name(maze_file), 'rb') as file:
+        data = file.read()
+    for length in (len(data) // 2, len(data) // 2 + 1, len(data) - 4, 10):
+        with open(graph_file_name(maze_file), 'wb') as file:
+            file.write(data[:length])
+        planner = HierarchicalPlanner(maze, 8)
+        assert not planner.load(graph_file_name(maze_file))  # the built graph is kept
+        assert [node.coords for node in planner.find_path()[1]] == [node.coords for node in expected[1]]
+        planner = HierarchicalPlanner.open(maze, maze_file, 8)
+        assert [node.coords for node in planner.find_path()[1]] == [node.coords for node in expected[1]]
+        with open(graph_file_name(maze_file), 'rb') as file:
+            assert file.read() == data
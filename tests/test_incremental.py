@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from incremental import IncrementalPlanner
+from maze import Maze
+from maze_format import load_text
+from paths import assert_walkable_path
+from search_path import find_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('maze_file', ('maze.txt', 'maze2.txt'))
+def test_plan_is_as_short_as_bfs_path_after_edits(maze_file: str):
+    maze = Maze.from_grid(load_text(os.path.join(ROOT, maze_file)))
+    planner = IncrementalPlanner(maze)
+
+    def check_plan() -> list:
+        path = planner.plan()[1]
+        assert_walkable_path(maze.grid, path)
+        assert len(path) == len(find_path(maze.grid, 'BFS')[1])
+        return path
+
+    path = check_plan()
+    blocked = path[len(path) // 2].coords
+    opened = next((x, y) for y in range(1, maze.height - 1) for x in range(1, maze.width - 1)
+                  if maze.grid[y][x] == 1)
+    maze.set_wall(*blocked)
+    check_plan()
+    maze.clear_cell(*opened)
+    check_plan()
+    maze.clear_cell(*blocked)
+    check_plan()
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from config import SearchEventKinds, Settings
+from maze import Maze
+from maze_format import load_text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_iter_solve_caches_finished_search():
+    maze = Maze.from_grid(load_text(os.path.join(ROOT, 'maze.txt')))
+    streamed = list(maze.iter_solve('A*'))
+    assert list(maze.iter_solve('A*')) == streamed
+    assert maze.solve('A*') == ([event.value for event in streamed[:-1]], streamed[-1].value)
+    assert maze.path_cache.cache_info()[:2] == (2, 1)
+
+
+def test_iter_solve_does_not_cache_stopped_search():
+    maze = Maze.from_grid(load_text(os.path.join(ROOT, 'maze.txt')))
+    list(maze.iter_solve('BFS', max_expansions=10))
+    assert len(maze.path_cache) == 0
+
+
+def _event_kinds(events) -> tuple:
+    events = list(events)
+    return sum(event.kind == SearchEventKinds.EXPLORED for event in events), events[-1].kind
+
+
+@pytest.mark.parametrize('max_expansions, expected', ((581, (581, SearchEventKinds.PATH)),
+                                                      (580, (580, SearchEventKinds.STOPPED)),
+                                                      (0, (0, SearchEventKinds.STOPPED))))
+def test_expansion_budget_gives_the_same_answer_live_and_cached(max_expansions: int, expected: tuple):
+    maze = Maze.from_grid(load_text(os.path.join(ROOT, 'maze.txt')))  # BFS inspects 581 cells
+    assert _event_kinds(maze.iter_solve('BFS', max_expansions)) == expected
+    maze.solve('BFS')
+    hits = maze.path_cache.hits
+    assert _event_kinds(maze.iter_solve('BFS', max_expansions)) == expected
+    assert maze.path_cache.hits == hits + 1
+
+
+def test_iter_solve_does_not_cache_large_searches(monkeypatch):
+    monkeypatch.setattr(Settings, 'STREAM_CACHE_MAX_EXPLORED', 100)
+    maze = Maze.from_grid(load_text(os.path.join(ROOT, 'maze.txt')))
+    list(maze.iter_solve('BFS'))
+    assert len(maze.path_cache) == 0
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from config import GridSymbols
+from maze_format import load_binary, load_text, save_binary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_packed_binary_maze_keeps_walls_start_and_destination(tmp_path):
+    maze = load_text(os.path.join(ROOT, 'maze.txt'))
+    save_binary(str(tmp_path / 'maze.maze'), maze, packed=True)
+    assert load_binary(str(tmp_path / 'maze.maze'), use_numpy=False) == maze
+
+
+def test_packing_terrain_is_refused(tmp_path):
+    maze = load_text(os.path.join(ROOT, 'maze.txt'))
+    maze[1][1] = GridSymbols.MUD.value
+    with pytest.raises(ValueError):
+        save_binary(str(tmp_path / 'maze.maze'), maze, packed=True)
+    save_binary(str(tmp_path / 'maze.maze'), maze)
+    assert load_binary(str(tmp_path / 'maze.maze'), use_numpy=False) == maze
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from maze_format import load_text
+from paths import assert_walkable_path
+from search_path import find_path
+from search_stats import SearchStats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAZES = ('maze.txt', 'maze2.txt', 'maze3.txt')
+MODES = ('BFS', 'DFS', 'Greedy BFS', 'A*')
+SHORTEST_PATH_MODES = ('Bidirectional BFS', 'Bidirectional A*', 'Jump Point Search')
+
+# inspected cells and found path of the original list based search core for every maze and mode,
+# A* ones are of A* with path relaxation: it inspects the same number of cells in another order
+with open(os.path.join(ROOT, 'tests', 'data', 'find_path_expected.json')) as expected_file:
+    EXPECTED = json.load(expected_file)
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('maze_file', MAZES)
+def test_find_path_matches_original_search(maze_file: str, mode: str):
+    maze = load_text(os.path.join(ROOT, maze_file))
+    moves, path = find_path(maze, mode)
+    assert [list(node.coords) for node in moves] == EXPECTED[maze_file][mode]['moves']
+    assert [list(node.coords) for node in path] == EXPECTED[maze_file][mode]['path']
+
+
+@pytest.mark.parametrize('maze_file', MAZES)
+def test_a_star_path_is_as_short_as_bfs_path(maze_file: str):
+    maze = load_text(os.path.join(ROOT, maze_file))
+    assert len(find_path(maze, 'A*')[1]) == len(EXPECTED[maze_file]['BFS']['path'])
+
+
+@pytest.mark.parametrize('mode', ('Bidirectional BFS', 'Bidirectional A*'))
+def test_bidirectional_search_counts_frontier_operations(mode: str):
+    stats = SearchStats()
+    find_path(load_text(os.path.join(ROOT, 'maze.txt')), mode, stats=stats)
+    assert stats.pushes > stats.expanded and stats.pops > stats.expanded
+    assert stats.phase_times['frontier'] > 0
+
+
+@pytest.mark.parametrize('mode', SHORTEST_PATH_MODES)
+@pytest.mark.parametrize('maze_file', ('maze.txt', 'maze2.txt'))
+def test_shortest_path_modes_find_walkable_bfs_length_paths(maze_file: str, mode: str):
+    maze = load_text(os.path.join(ROOT, maze_file))
+    path = find_path(maze, mode)[1]
+    assert_walkable_path(maze, path)
+    assert len(path) == len(EXPECTED[maze_file]['BFS']['path'])
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+from server import MazeServer
+
+
+class _Writer:
+    """Stream writer stub that collects written response lines."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data: bytes) -> None:
+        self.lines.append(json.loads(data))
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _run_requests(maze_server: MazeServer, *requests: dict) -> list:
+    async def run():
+        reader = asyncio.StreamReader()
+        for request in requests:
+            reader.feed_data(json.dumps(request).encode() + b'\n')
+        reader.feed_eof()
+        writer = _Writer()
+        await maze_server.handle_connection(reader, writer)
+        return sorted(writer.lines, key=lambda response: response['id'])
+
+    return asyncio.run(run())
+
+
+def test_painted_start_is_passable_for_explicit_ends(tmp_path):
+    maze_file = tmp_path / 'maze.txt'
+    maze_file.write_text('0405\n')
+    with ThreadPoolExecutor(2) as executor:
+        maze_server = MazeServer(executor)
+        try:
+            responses = _run_requests(maze_server, {'id': 1, 'op': 'load', 'maze': 'm', 'file': str(maze_file)})
+            responses += _run_requests(maze_server,
+                                       {'id': 2, 'op': 'solve', 'maze': 'm', 'mode': 'BFS',
+                                        'start': [0, 0], 'destination': [3, 0]},
+                                       {'id': 3, 'op': 'solve', 'maze': 'm', 'mode': 'A*'})
+        finally:
+            maze_server.close()
+    assert [response['ok'] for response in responses] == [True] * 3
+    assert responses[1]['path'] == [[2, 0], [1, 0]]
+    assert responses[2]['path'] == [[2, 0]]
+
+
+def test_workers_drop_unloaded_mazes(tmp_path):
+    maze_file = tmp_path / 'maze.txt'
+    maze_file.write_text('4005\n')
+    solve = {'op': 'solve', 'mode': 'BFS'}
+    with ThreadPoolExecutor(1) as executor:  # thread workers share worker state with the test
+        maze_server = MazeServer(executor)
+        try:
+            _run_requests(maze_server, {'id': 1, 'op': 'load', 'maze': 'm', 'file': str(maze_file)},
+                          {'id': 2, 'op': 'load', 'maze': 'n', 'file': str(maze_file)})
+            _run_requests(maze_server, dict(solve, id=3, maze='m'))
+            _run_requests(maze_server, {'id': 4, 'op': 'unload', 'maze': 'm'})
+            responses = _run_requests(maze_server, dict(solve, id=5, maze='n'))
+            assert responses[0]['path'] == [[2, 0], [1, 0]]
+            assert set(server._worker_mazes) == {maze_server.mazes['n'].token}
+        finally:
+            maze_server.close()
+
+
+def test_unexpected_errors_are_answered(tmp_path):
+    with ThreadPoolExecutor(1) as executor:
+        responses = _run_requests(MazeServer(executor), {'id': 1, 'op': 'load', 'maze': 'm', 'file': str(tmp_path)})
+    assert responses[0]['id'] == 1 and responses[0]['ok'] is False
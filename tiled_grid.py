@@ -0,0 +1,212 @@
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import GridSymbols, Settings
+from grid import GridBackend, PASSABLE_VALUES, cost_table
+from maze_format import load_binary, read_header
+
+
+class _Tile:
+    """Cells of one tile copied to memory, their passability and move costs flattened row by row.
+    Costs are computed on the first weighted query of the tile."""
+    __slots__ = ('cells', 'passable', 'costs', 'width')
+
+    def __init__(self, cells: np.ndarray):
+        self.cells = cells
+        self.passable = bytearray(np.isin(cells, PASSABLE_VALUES).tobytes())
+        self.costs: Optional[bytearray] = None
+        self.width = cells.shape[1]
+
+
+class _TiledRow:
+    """Row proxy that makes grid[y][x] reads and writes work for TiledGrid."""
+    __slots__ = ('grid', 'y')
+
+    def __init__(self, grid: 'TiledGrid', y: int):
+        self.grid = grid
+        self.y = y
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __getitem__(self, x: int) -> int:
+        return self.grid.get(x, self.y)
+
+    def __setitem__(self, x: int, value: int) -> None:
+        self.grid.set(x, self.y, value)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.grid.read_row(self.y))
+
+
+class _TiledPassability:
+    """Passability of TiledGrid cells indexed by flat cell index like grid.passable_cells result."""
+    __slots__ = ('grid',)
+
+    def __init__(self, grid: 'TiledGrid'):
+        self.grid = grid
+
+    def __getitem__(self, index: int) -> int:
+        y, x = divmod(index, self.grid.width)
+        tile_size = self.grid.tile_size
+        tile = self.grid.tile(x // tile_size, y // tile_size)
+        return tile.passable[(y % tile_size) * tile.width + x % tile_size]
+
+
+class _TiledCosts:
+    """Move costs of TiledGrid cells indexed by flat cell index like grid.cell_costs result."""
+    __slots__ = ('grid', 'table')
+
+    def __init__(self, grid: 'TiledGrid'):
+        self.grid = grid
+        self.table = cost_table()
+
+    def __getitem__(self, index: int) -> int:
+        y, x = divmod(index, self.grid.width)
+        tile_size = self.grid.tile_size
+        tile = self.grid.tile(x // tile_size, y // tile_size)
+        if tile.costs is None:
+            tile.costs = bytearray(self.table[tile.cells].tobytes())
+        return tile.costs[(y % tile_size) * tile.width + x % tile_size]
+
+
+class TiledGrid(GridBackend):
+    """Grid stored in binary maze file (see maze_format, the file must not be packed) for mazes larger than memory.
+    Cells are read from the memory-mapped file in square tiles of tile_size cells when they are accessed,
+    max_tiles recently used tiles are kept in memory. Changes are written through to the file mapping:
+    mode 'c' keeps them in private memory pages (the file isn't changed), 'r+' writes them to the file
+    (see flush), 'r' makes the grid read only.
+    Cells are accessed as grid[y][x] like in the other grids, but get and set methods are faster."""
+
+    def __init__(self, file_name: str, tile_size: int = 256, max_tiles: int = 256, mode: str = 'c'):
+        header = read_header(file_name)
+        if header.packed:
+            raise ValueError('Tiled grid needs binary maze file with not packed cells')
+        self.file_name = file_name
+        self.width, self.height = header.width, header.height
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.hits = 0  # tile switches served from memory
+        self.misses = 0  # tiles read from the file
+        self.__cells = load_binary(file_name, mode)
+        self.__tiles = OrderedDict()
+        self.__last_tile_key, self.__last_tile = None, None
+        self.__changed_tiles = set()  # tiles changed since the grid was opened or explored marks were replaced
+        # positions of start and destination saved in the file header, checked first by find_value
+        self.__hints = {GridSymbols.START.value: header.start, GridSymbols.DESTINATION.value: header.destination}
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> _TiledRow:
+        if not 0 <= y < self.height:
+            raise IndexError('row index out of range')
+        return _TiledRow(self, y)
+
+    def __iter__(self) -> Iterator[_TiledRow]:
+        return (_TiledRow(self, y) for y in range(self.height))
+
+    def tile(self, tile_x: int, tile_y: int) -> _Tile:
+        """Returns tile by its position, reads it from the file if it is not in memory."""
+        key = tile_x, tile_y
+        if key == self.__last_tile_key:
+            return self.__last_tile
+        tile = self.__tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            top, left = tile_y * self.tile_size, tile_x * self.tile_size
+            tile = _Tile(np.array(self.__cells[top:top + self.tile_size, left:left + self.tile_size]))
+            self.__tiles[key] = tile
+            if len(self.__tiles) > self.max_tiles:
+                self.__tiles.popitem(last=False)
+        else:
+            self.hits += 1
+            self.__tiles.move_to_end(key)
+        self.__last_tile_key, self.__last_tile = key, tile
+        return tile
+
+    def get(self, x: int, y: int) -> int:
+        tile = self.tile(x // self.tile_size, y // self.tile_size)
+        return int(tile.cells[y % self.tile_size, x % self.tile_size])
+
+    def set(self, x: int, y: int, value: int) -> None:
+        self.__cells[y, x] = value
+        key = x // self.tile_size, y // self.tile_size
+        tile = self.__tiles.get(key)
+        if tile is not None:
+            tile.cells[y % self.tile_size, x % self.tile_size] = value
+            index = (y % self.tile_size) * tile.width + x % self.tile_size
+            tile.passable[index] = value in PASSABLE_VALUES
+            if tile.costs is not None:
+                tile.costs[index] = Settings.TERRAIN_COSTS.get(value, 1)
+        self.__changed_tiles.add(key)
+        if value in self.__hints:
+            self.__hints[value] = x, y
+
+    def read_row(self, y: int) -> List[int]:
+        return self.__cells[y].tolist()
+
+    def flush(self) -> None:
+        """Writes changes to the file (in 'r+' mode)."""
+        self.__cells.flush()
+
+    def __drop_tiles(self) -> None:
+        self.__tiles.clear()
+        self.__last_tile_key, self.__last_tile = None, None
+
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def find_value(self, value: int) -> Optional[Tuple[int, int]]:
+        """Returns (x, y) of the 1st occurrence of value. Start and destination positions are checked first
+        in the header hints, other values are searched in bands of tile_size rows."""
+        hint = self.__hints.get(value)
+        if hint and self.get(*hint) == value:
+            return hint
+        for top in range(0, self.height, self.tile_size):
+            mask = self.__cells[top:top + self.tile_size] == value
+            index = int(mask.argmax())
+            if mask.flat[index]:
+                return index % self.width, top + index // self.width
+        return None
+
+    def fill(self, value: int) -> None:
+        for top in range(0, self.height, self.tile_size):
+            self.__cells[top:top + self.tile_size] = value
+        self.__drop_tiles()
+        self.__changed_tiles.clear()
+        self.__hints = {key: None for key in self.__hints}
+
+    def replace_values(self, values: Tuple[int, ...], new_value: int) -> None:
+        """Replaces values in tiles changed since the grid was opened (or since the previous call),
+        so wiping explored cells doesn't read the whole file. Values saved in the file are kept."""
+        for tile_x, tile_y in self.__changed_tiles:
+            top, left = tile_y * self.tile_size, tile_x * self.tile_size
+            cells = self.__cells[top:top + self.tile_size, left:left + self.tile_size]
+            cells[np.isin(cells, values)] = new_value
+            self.__tiles.pop((tile_x, tile_y), None)
+        self.__changed_tiles.clear()
+        self.__last_tile_key, self.__last_tile = None, None
+
+    def passable_cells(self) -> _TiledPassability:
+        return _TiledPassability(self)
+
+    def cell_costs(self) -> _TiledCosts:
+        return _TiledCosts(self)
+
+    def wall_mask(self) -> np.ndarray:
+        """Returns walls of the whole grid, the file is read in bands of tile_size rows."""
+        mask = np.empty((self.height, self.width), dtype=bool)
+        for top in range(0, self.height, self.tile_size):
+            mask[top:top + self.tile_size] = self.__cells[top:top + self.tile_size] == GridSymbols.WALL.value
+        return mask
+
+    def free_cells(self) -> bytearray:
+        """Returns not wall cells of the whole grid, the file is read in bands of tile_size rows."""
+        free = bytearray(self.width * self.height)
+        for top in range(0, self.height, self.tile_size):
+            band = self.__cells[top:top + self.tile_size] != GridSymbols.WALL.value
+            free[top * self.width:top * self.width + band.size] = band.tobytes()
+        return free